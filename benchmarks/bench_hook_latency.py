@@ -3,17 +3,25 @@
 Measures per-invocation latency of pre_tool_use and post_tool_use hooks.
 Run from the repo root:
     python3 benchmarks/bench_hook_latency.py
+
+Two numbers per hook:
+  cold — a fresh interpreter per call, which is what Claude Code pays
+  warm — a long-lived HookWorkerPool worker, i.e. the hook's own work
 """
 
-import json
 import subprocess
 import sys
 import time
+from array import array
 from pathlib import Path
-from statistics import mean, median, stdev
+from statistics import mean, median, quantiles, stdev
 
 REPO = Path(__file__).resolve().parents[1]
 PYTHON = sys.executable
+sys.path.insert(0, str(REPO))
+
+from benchmarks.harness import HookWorkerPool
+from raii import jsonio
 
 TOOLS = [
     ("Read",   {"file_path": "/Users/sanjitrameshkumar/.zshrc"},  "file content " * 200),
@@ -22,32 +30,45 @@ TOOLS = [
 ]
 
 
-def run_hook(script: str, event: dict) -> float:
-    start = time.perf_counter()
-    proc = subprocess.run(
-        [PYTHON, str(REPO / "hooks" / script)],
-        input=json.dumps(event),
-        capture_output=True,
-        text=True,
+def run_hook(hook: str, event) -> None:
+    """
+    Run one hook in a fresh interpreter, the way Claude Code invokes it.
+    event may be a dict or already-encoded JSON bytes.
+    """
+    body = event if isinstance(event, bytes) else jsonio.dumps(event)
+    proc = subprocess.Popen(
+        [PYTHON, str(REPO / "hooks" / f"{hook}.py")],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        bufsize=0,
     )
-    elapsed = time.perf_counter() - start
+    # communicate() drains stdout and stderr together; reading one to EOF
+    # first deadlocks once the hook fills the other pipe's buffer.
+    _, err = proc.communicate(body)
     if proc.returncode != 0:
-        print(f"  STDERR: {proc.stderr[:200]}", file=sys.stderr)
-    return elapsed
+        print(f"  STDERR: {err[:200].decode(errors='replace')}", file=sys.stderr)
 
 
-def bench(hook_script: str, events: list[dict], n: int = 50) -> dict:
-    times = []
+def bench(call, hook: str, events: list[dict], n: int = 50) -> dict:
+    # Integer nanoseconds into a preallocated buffer keep the timing loop
+    # itself out of the measurement as much as possible.
+    times = array("q", bytes(8 * n * len(events)))
+    clock = time.perf_counter_ns
+    i = 0
     for _ in range(n):
         for ev in events:
-            times.append(run_hook(hook_script, ev))
+            start = clock()
+            call(hook, ev)
+            times[i] = clock() - start
+            i += 1
     return {
         "n": len(times),
-        "mean_ms": mean(times) * 1000,
-        "median_ms": median(times) * 1000,
-        "stdev_ms": stdev(times) * 1000,
-        "p95_ms": sorted(times)[int(len(times) * 0.95)] * 1000,
-        "max_ms": max(times) * 1000,
+        "mean_ms": mean(times) / 1e6,
+        "median_ms": median(times) / 1e6,
+        "stdev_ms": stdev(times) / 1e6,
+        "p95_ms": quantiles(times, n=20, method="inclusive")[18] / 1e6,
+        "max_ms": max(times) / 1e6,
     }
 
 
@@ -72,25 +93,34 @@ def main():
         }
         for name, inp, result in TOOLS
     ]
+    # The same events are replayed hundreds of times; encode them once so
+    # the timings don't include the bench's own serialization.
+    pre_events = [jsonio.dumps(ev) for ev in pre_events]
+    post_events = [jsonio.dumps(ev) for ev in post_events]
+
+    pool = HookWorkerPool()
+    modes = [("cold", run_hook), ("warm", pool.call)]
 
     print(f"Warming up...")
-    for ev in pre_events:
-        run_hook("pre_tool_use.py", ev)
-    for ev in post_events:
-        run_hook("post_tool_use.py", ev)
-
-    print(f"\nBenchmarking pre_tool_use ({len(pre_events)*50} calls)...")
-    pre = bench("pre_tool_use.py", pre_events)
-    print(f"  mean={pre['mean_ms']:.1f}ms  median={pre['median_ms']:.1f}ms  "
-          f"p95={pre['p95_ms']:.1f}ms  max={pre['max_ms']:.1f}ms")
-
-    print(f"\nBenchmarking post_tool_use ({len(post_events)*50} calls)...")
-    post = bench("post_tool_use.py", post_events)
-    print(f"  mean={post['mean_ms']:.1f}ms  median={post['median_ms']:.1f}ms  "
-          f"p95={post['p95_ms']:.1f}ms  max={post['max_ms']:.1f}ms")
-
-    total_overhead_per_call = pre["mean_ms"] + post["mean_ms"]
-    print(f"\nEstimated overhead per tool call: {total_overhead_per_call:.1f}ms")
+    for _, call in modes:
+        for ev in pre_events:
+            call("pre_tool_use", ev)
+        for ev in post_events:
+            call("post_tool_use", ev)
+
+    results = {}
+    for mode, call in modes:
+        for hook, events in (("pre_tool_use", pre_events), ("post_tool_use", post_events)):
+            print(f"\nBenchmarking {hook} [{mode}] ({len(events)*50} calls)...")
+            r = bench(call, hook, events)
+            print(f"  mean={r['mean_ms']:.1f}ms  median={r['median_ms']:.1f}ms  "
+                  f"p95={r['p95_ms']:.1f}ms  max={r['max_ms']:.1f}ms")
+            results[mode, hook] = r
+    pool.close()
+
+    for mode, _ in modes:
+        total = results[mode, "pre_tool_use"]["mean_ms"] + results[mode, "post_tool_use"]["mean_ms"]
+        print(f"\nEstimated overhead per tool call [{mode}]: {total:.1f}ms")
     print(f"(Claude Code tool calls typically take 500ms–30s, so <50ms overhead is fine)")
 
 
@@ -12,41 +12,282 @@ Usage:
         h.read_file("/src/foo.py")
         h.task_update("t1", "completed")
         print(h.metrics())
+        h.close()
 """
 
-import json
+import atexit
+import importlib
 import os
+import socket
 import sqlite3
+import struct
 import subprocess
 import sys
+import threading
+import traceback
+from collections import deque
 from pathlib import Path
 from typing import Optional
 
+from raii import jsonio
+
 REPO = Path(__file__).resolve().parents[1]
 PYTHON = sys.executable
+WORKER = REPO / "hooks" / "_worker.py"
+
+HOOKS = ("pre_tool_use", "post_tool_use", "pre_compact", "session_start")
+
+# Files the hooks leave next to state.db between calls.
+STATE_FILES = ("eviction_hints.json", "compliance_monitor.json", "pending_tag.bin")
+
+DEFAULT_READ_CONTENT = "x" * 400   # ~100 tokens
+
+# Frame header: big-endian uint32 body length. Must match hooks/_worker.py.
+_HEADER = struct.Struct(">I")
+
+
+class HookWorkerPool:
+    """
+    Pool of long-lived hooks/_worker.py processes.
+
+    Each worker imports the hook modules once and then serves length-prefixed
+    JSON frames over a socketpair, so a hook call costs one round trip instead
+    of a fresh interpreter. A worker that times out or dies is killed and
+    replaced.
+    """
+
+    def __init__(self, size: int = 1, env: Optional[dict] = None, timeout: float = 30.0):
+        self._env = env
+        self._timeout = timeout
+        self._lock = threading.Lock()
+        self._idle: deque = deque()
+        self._workers: list = []
+        self._closed = False
+        for _ in range(size):
+            self._idle.append(self._spawn())
+        atexit.register(self.close)
+
+    def call(self, hook: str, event) -> dict:
+        """
+        Run one hook (e.g. "pre_tool_use") on a warm worker and return its output.
+        event may be a dict or already-encoded JSON bytes; callers that replay
+        the same events can encode them once and skip the per-call dumps.
+        """
+        if isinstance(event, bytes):
+            return self._send(b'{"hook":"' + hook.encode() + b'","event":' + event + b"}")
+        return self._request({"hook": hook, "event": event})
+
+    def call_batch(self, calls: list) -> list:
+        """
+        Run [{"hook": ..., "event": ...}, ...] in order in one round trip and
+        return the outputs. See hooks/_worker.py for the blocking rule.
+        """
+        return self._request({"batch": calls}).get("results", [{} for _ in calls])
+
+    def close(self) -> None:
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers, self._workers = self._workers, []
+            self._idle.clear()
+        # Registered in __init__; drop it so the atexit list doesn't keep
+        # every closed pool alive until the interpreter exits.
+        atexit.unregister(self.close)
+        for worker in workers:
+            worker.stop()
+
+    # ------------------------------------------------------------------
+    # Internal helpers
+    # ------------------------------------------------------------------
+
+    def _request(self, request: dict) -> dict:
+        return self._send(jsonio.dumps(request))
+
+    def _send(self, body: bytes) -> dict:
+        worker = self._acquire()
+        try:
+            out = worker.request(body, self._timeout)
+        except Exception:
+            self._replace(worker)
+            raise
+        self._release(worker)
+        return jsonio.loads(out) if out else {}
+
+    def _spawn(self) -> "_Worker":
+        worker = _Worker(self._env)
+        self._workers.append(worker)
+        return worker
+
+    def _acquire(self) -> "_Worker":
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("HookWorkerPool is closed")
+            if self._idle:
+                return self._idle.popleft()
+            return self._spawn()
+
+    def _release(self, worker: "_Worker") -> None:
+        with self._lock:
+            if self._closed:
+                worker.stop()
+            else:
+                self._idle.append(worker)
+
+    def _replace(self, worker: "_Worker") -> None:
+        worker.stop()
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            if not self._closed:
+                self._idle.append(self._spawn())
+
+
+class _Worker:
+    """One hooks/_worker.py process and the parent end of its socketpair."""
+
+    def __init__(self, env: Optional[dict]):
+        self.sock, child = socket.socketpair()
+        self.proc = subprocess.Popen(
+            [PYTHON, str(WORKER), str(child.fileno())],
+            pass_fds=(child.fileno(),),
+            env=env,
+        )
+        child.close()
+
+    def request(self, body: bytes, timeout: float) -> bytes:
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.sendall(_HEADER.pack(len(body)) + body)
+            (n,) = _HEADER.unpack(self._recv_exact(_HEADER.size))
+            return self._recv_exact(n)
+        except socket.timeout:
+            raise TimeoutError(f"hook worker {self.proc.pid} timed out after {timeout}s")
+
+    def stop(self) -> None:
+        self.sock.close()   # worker sees EOF and exits
+        try:
+            self.proc.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+    def _recv_exact(self, n: int) -> bytes:
+        buf = bytearray(n)
+        view = memoryview(buf)
+        got = 0
+        while got < n:
+            k = self.sock.recv_into(view[got:])
+            if not k:
+                raise RuntimeError(
+                    f"hook worker {self.proc.pid} exited (code {self.proc.poll()})"
+                )
+            got += k
+        return bytes(buf)
+
+
+def _redirect_state(db_dir: Path) -> None:
+    """
+    Point the imported raii/hooks modules at db_dir.
+
+    These modules bind their state paths at import time, so for in-process
+    runs setting RAII_DB_DIR only affects the first harness in the process.
+    """
+    from raii import compaction_advisor, storage
+
+    storage.DB_DIR = db_dir
+    storage.DB_PATH = db_dir / "state.db"
+    compaction_advisor.HINTS_PATH = db_dir / "eviction_hints.json"
+    compaction_advisor.COMPLIANCE_MONITOR_PATH = db_dir / "compliance_monitor.json"
 
 
 class ScenarioHarness:
-    def __init__(self, tmp_dir: Path, session_id: str = "scenario-session"):
+    """
+    Drives the hooks for one scenario.
+
+    By default each hook call goes to a warm HookWorkerPool process. With
+    in_process=True the hook modules are imported into this interpreter and
+    their handle() functions are called directly — no pipes, no JSON. Only
+    one in-process harness may be active at a time.
+    """
+
+    def __init__(
+        self,
+        tmp_dir: Path,
+        session_id: str = "scenario-session",
+        in_process: bool = False,
+    ):
         self.tmp_dir = Path(tmp_dir)
         self.session_id = session_id
         self._call_count = 0
         self._env = {**os.environ, "RAII_DB_DIR": str(self.tmp_dir)}
+        self._pool: Optional[HookWorkerPool] = None
+        self._modules: dict = {}
+        self._conn: Optional[sqlite3.Connection] = None
+        if in_process:
+            os.environ["RAII_DB_DIR"] = str(self.tmp_dir)
+            self._modules = {h: importlib.import_module(f"hooks.{h}") for h in HOOKS}
+            _redirect_state(self.tmp_dir)
+        else:
+            self._pool = HookWorkerPool(env=self._env)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.close()
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
     # ------------------------------------------------------------------
     # Hook execution
     # ------------------------------------------------------------------
 
-    def _hook(self, script: str, event: dict) -> dict:
-        proc = subprocess.run(
-            [PYTHON, str(REPO / "hooks" / script)],
-            input=json.dumps(event),
-            capture_output=True,
-            text=True,
-            env=self._env,
-        )
-        out = proc.stdout.strip()
-        return json.loads(out) if out else {}
+    def _hook(self, hook: str, event: dict) -> dict:
+        if self._pool is not None:
+            return self._pool.call(hook, event)
+        try:
+            return self._modules[hook].handle(event)
+        except Exception:
+            # Same outcome as a crashed hook process: no output.
+            traceback.print_exc()
+            return {}
+
+    def _hook_batch(self, calls: list) -> list:
+        if self._pool is not None:
+            return self._pool.call_batch(calls)
+        results = []
+        for call in calls:
+            # Mirror hooks/_worker.py: no post_tool_use for a blocked tool.
+            if (
+                call["hook"] == "post_tool_use"
+                and results
+                and results[-1].get("decision") == "block"
+            ):
+                results.append({})
+            else:
+                results.append(self._hook(call["hook"], call["event"]))
+        return results
+
+    def _tool_event(self, tool_name: str, tool_input: dict, tool_use_id: Optional[str]) -> dict:
+        self._call_count += 1
+        return {
+            "session_id": self.session_id,
+            "tool_name": tool_name,
+            "tool_use_id": tool_use_id or f"tu-{self._call_count:04d}",
+            "tool_input": tool_input,
+        }
+
+    @staticmethod
+    def _tool_outcome(pre: dict) -> dict:
+        if pre.get("decision") == "block":
+            return {"blocked": True, "reason": pre.get("reason", "")}
+        return {"blocked": False}
 
     def tool_call(
         self,
@@ -56,21 +297,34 @@ class ScenarioHarness:
         tool_use_id: Optional[str] = None,
     ) -> dict:
         """Fire pre_tool_use then post_tool_use for a single tool call."""
-        self._call_count += 1
-        tid = tool_use_id or f"tu-{self._call_count:04d}"
-        base = {
-            "session_id": self.session_id,
-            "tool_name": tool_name,
-            "tool_use_id": tid,
-            "tool_input": tool_input,
-        }
-        pre = self._hook("pre_tool_use.py", base)
+        base = self._tool_event(tool_name, tool_input, tool_use_id)
+        pre = self._hook("pre_tool_use", base)
         if pre.get("decision") == "block":
-            return {"blocked": True, "reason": pre.get("reason", "")}
+            return self._tool_outcome(pre)
 
         response = tool_response if tool_response is not None else {"text": "ok"}
-        self._hook("post_tool_use.py", {**base, "tool_response": response})
-        return {"blocked": False}
+        self._hook("post_tool_use", {**base, "tool_response": response})
+        return self._tool_outcome(pre)
+
+    def tool_call_batch(self, calls: list) -> list:
+        """
+        Fire several tool calls in one hook round trip.
+
+        Each call is a dict with tool_name, tool_input and optionally
+        tool_response / tool_use_id, as for tool_call(). Hooks still run
+        pre, post, pre, post... in order, so results match calling
+        tool_call() in a loop.
+        """
+        hook_calls = []
+        for c in calls:
+            base = self._tool_event(c["tool_name"], c["tool_input"], c.get("tool_use_id"))
+            response = c.get("tool_response")
+            if response is None:
+                response = {"text": "ok"}
+            hook_calls.append({"hook": "pre_tool_use", "event": base})
+            hook_calls.append({"hook": "post_tool_use", "event": {**base, "tool_response": response}})
+        results = self._hook_batch(hook_calls)
+        return [self._tool_outcome(pre) for pre in results[::2]]
 
     # ------------------------------------------------------------------
     # Convenience wrappers
@@ -90,14 +344,41 @@ class ScenarioHarness:
             {"text": f"Updated task #{task_id} status"},
         )
 
+    def task_start(self, task_id: str, subject: str, depends_on: list = None):
+        """task_create() then task_update(task_id, "in_progress"), in one round trip."""
+        self.tool_call_batch([
+            {
+                "tool_name": "TaskCreate",
+                "tool_input": {"id": task_id, "subject": subject, "dependsOn": depends_on or []},
+                "tool_response": {"text": f"Task created: {subject}"},
+            },
+            {
+                "tool_name": "TaskUpdate",
+                "tool_input": {"taskId": task_id, "status": "in_progress"},
+                "tool_response": {"text": f"Updated task #{task_id} status"},
+            },
+        ])
+
     def read_file(self, file_path: str, content: str = None):
-        c = content or ("x" * 400)  # ~100 tokens
+        c = content or DEFAULT_READ_CONTENT
         self.tool_call(
             "Read",
             {"file_path": file_path},
             {"file": {"filePath": file_path, "content": c}},
         )
 
+    def read_files(self, file_paths: list, content_fn=None):
+        """Batched read_file() for independent reads; content_fn(path) -> content."""
+        calls = []
+        for path in file_paths:
+            c = (content_fn(path) if content_fn else None) or DEFAULT_READ_CONTENT
+            calls.append({
+                "tool_name": "Read",
+                "tool_input": {"file_path": path},
+                "tool_response": {"file": {"filePath": path, "content": c}},
+            })
+        self.tool_call_batch(calls)
+
     def edit_file(self, file_path: str, old_string: str = "old", new_string: str = "new content"):
         self.tool_call(
             "Edit",
@@ -121,7 +402,7 @@ class ScenarioHarness:
 
     def pre_compact(self):
         """Fire the PreCompact hook to run the eviction engine and generate hints."""
-        return self._hook("pre_compact.py", {
+        return self._hook("pre_compact", {
             "session_id": self.session_id,
             "trigger": "auto",
             "context_window_tokens": 50000,
@@ -132,14 +413,43 @@ class ScenarioHarness:
     # ------------------------------------------------------------------
 
     def query_db(self, sql: str, params=()) -> list:
-        db_path = self.tmp_dir / "state.db"
-        if not db_path.exists():
+        conn = self._connect()
+        if conn is None:
             return []
-        conn = sqlite3.connect(db_path)
-        conn.row_factory = sqlite3.Row
-        rows = conn.execute(sql, params).fetchall()
-        conn.close()
-        return [dict(r) for r in rows]
+        return [dict(r) for r in conn.execute(sql, params).fetchall()]
+
+    def reset(self) -> None:
+        """
+        Wipe all rows and state files so tmp_dir can host another scenario.
+        The schema (and the DB file) is kept, so the hooks skip re-creating it.
+        """
+        self._call_count = 0
+        for name in STATE_FILES:
+            (self.tmp_dir / name).unlink(missing_ok=True)
+        conn = self._connect()
+        if conn is None:
+            return
+        tables = [
+            r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+        ]
+        conn.execute("BEGIN")
+        for table in tables:
+            conn.execute(f'DELETE FROM "{table}"')
+        conn.execute("COMMIT")
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        if self._conn is None:
+            db_path = self.tmp_dir / "state.db"
+            # Don't create the file ourselves — the hooks initialize the schema.
+            if not db_path.exists():
+                return None
+            self._conn = sqlite3.connect(db_path, isolation_level=None)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA temp_store=MEMORY")
+            self._conn.execute("PRAGMA mmap_size=268435456")
+        return self._conn
 
     def chunk_status(self, chunk_id: str) -> Optional[str]:
         rows = self.query_db(
@@ -152,24 +462,29 @@ class ScenarioHarness:
     # ------------------------------------------------------------------
 
     def metrics(self) -> dict:
-        chunks = self.query_db(
-            "SELECT id, tool_name, status, size_tokens, tool_input, "
-            "created_at, status_changed_at FROM context_chunks"
-        )
-        tasks = self.query_db("SELECT id, status FROM tasks")
+        chunk_totals = {
+            r["status"]: r
+            for r in self.query_db(
+                "SELECT status, COUNT(*) AS n, COALESCE(SUM(size_tokens), 0) AS t "
+                "FROM context_chunks GROUP BY status"
+            )
+        }
+        task_counts = {
+            r["status"]: r["n"]
+            for r in self.query_db("SELECT status, COUNT(*) AS n FROM tasks GROUP BY status")
+        }
 
-        total = len(chunks)
-        evictable = sum(1 for c in chunks if c["status"] == "evictable")
-        total_tokens = sum(c["size_tokens"] for c in chunks)
-        evictable_tokens = sum(
-            c["size_tokens"] for c in chunks if c["status"] == "evictable"
-        )
+        total = sum(r["n"] for r in chunk_totals.values())
+        total_tokens = sum(r["t"] for r in chunk_totals.values())
+        evicted = chunk_totals.get("evictable")
+        evictable = evicted["n"] if evicted else 0
+        evictable_tokens = evicted["t"] if evicted else 0
 
-        total_tasks = len(tasks)
-        completed_tasks = sum(1 for t in tasks if t["status"] == "completed")
-        abandoned_tasks = sum(1 for t in tasks if t["status"] == "abandoned")
+        total_tasks = sum(task_counts.values())
+        completed_tasks = task_counts.get("completed", 0)
+        abandoned_tasks = task_counts.get("abandoned", 0)
 
-        refetches = self._count_refetches(chunks)
+        refetches = self._count_refetches()
 
         return {
             "total_chunks": total,
@@ -186,32 +501,25 @@ class ScenarioHarness:
             "refetch_rate": refetches / max(evictable, 1),
         }
 
-    def _count_refetches(self, chunks: list) -> int:
+    def _count_refetches(self) -> int:
         """
         Proxy for false eviction: count Read chunks where the same file was
         re-read AFTER that chunk was marked evictable. This indicates the
         eviction was premature — Claude had to re-fetch content it lost.
         """
-        evicted_reads = [
-            c for c in chunks
-            if c["tool_name"] == "Read"
-            and c["status"] == "evictable"
-            and c.get("status_changed_at")
-        ]
-        all_reads = [c for c in chunks if c["tool_name"] == "Read"]
-
-        count = 0
-        for evicted in evicted_reads:
-            try:
-                evicted_path = json.loads(evicted["tool_input"]).get("file_path")
-                evicted_at = evicted["status_changed_at"]
-                for later in all_reads:
-                    if later["id"] == evicted["id"]:
-                        continue
-                    later_path = json.loads(later["tool_input"]).get("file_path")
-                    if later_path == evicted_path and later["created_at"] > evicted_at:
-                        count += 1
-                        break
-            except Exception:
-                pass
-        return count
+        rows = self.query_db(
+            """
+            SELECT COUNT(*) AS n FROM context_chunks e
+            WHERE e.tool_name = 'Read'
+              AND e.status = 'evictable'
+              AND e.status_changed_at IS NOT NULL AND e.status_changed_at != ''
+              AND EXISTS (
+                  SELECT 1 FROM context_chunks l
+                  WHERE l.target_path = e.target_path
+                    AND l.created_at > e.status_changed_at
+                    AND l.tool_name = 'Read'
+                    AND l.id != e.id
+              )
+            """
+        )
+        return rows[0]["n"] if rows else 0
@@ -18,9 +18,45 @@ DB_PATH = Path.home() / ".claude" / "raii" / "state.db"
 HINTS_PATH = Path.home() / ".claude" / "raii" / "eviction_hints.json"
 
 
+# Every dashboard figure in one round trip. Each row is tagged with the
+# section it belongs to; `ord` keeps per-section ordering stable.
+DASHBOARD_SQL = """
+SELECT 'task' AS kind, status AS k, NULL AS label, COUNT(*) AS n, 0 AS tokens, 0 AS ord
+FROM tasks GROUP BY status
+UNION ALL
+SELECT 'active', id, subject, 0, 0, created_at
+FROM tasks WHERE status IN ('pending','in_progress')
+UNION ALL
+SELECT 'chunk', status, NULL, COUNT(*), COALESCE(SUM(size_tokens),0), 0
+FROM context_chunks GROUP BY status
+UNION ALL
+SELECT 'edges', NULL, NULL, COUNT(*), 0, 0 FROM reference_edges
+UNION ALL
+SELECT 'blocked', NULL, NULL, COUNT(DISTINCT re.target_chunk_id), 0, 0
+FROM reference_edges re
+JOIN tasks t ON t.id = re.source_task_id
+WHERE t.status IN ('pending','in_progress')
+UNION ALL
+SELECT 'evictable_tool', tool_name, NULL, COUNT(*), SUM(size_tokens), -SUM(size_tokens)
+FROM context_chunks WHERE status = 'evictable' GROUP BY tool_name
+ORDER BY kind, ord
+"""
+
+
+# Bar strings for 0..100 units, built once instead of per row on every refresh.
+BARS = ["█" * i for i in range(101)]
+
+
+def pct_bar(pct: int) -> str:
+    """One block per 3 percentage points."""
+    return BARS[min(pct // 3, 33)]
+
+
 def connect():
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, isolation_level=None)
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA mmap_size=268435456")
     return conn
 
 
@@ -30,6 +66,22 @@ def fmt_tokens(n: int) -> str:
     return str(n)
 
 
+def print_hints(path: Path = HINTS_PATH) -> None:
+    """The LAST EVICTION HINTS section, if PreCompact has written hints."""
+    if not path.exists():
+        return
+    hints = json.loads(path.read_text())
+    if hints.get("empty"):
+        # generate_hints() had nothing to report (raii.compaction_advisor.EMPTY_HINTS)
+        print(f"\nLAST EVICTION HINTS  (nothing to report)")
+        return
+    generated = hints.get("generated_at") or ""
+    print(f"\nLAST EVICTION HINTS  ({generated[:19]})")
+    print(f"  Safe to evict:   {len(hints.get('safe_to_evict', []))} chunks")
+    print(f"  Preserved:       {len(hints.get('critical_to_preserve', []))} chunks")
+    print(f"  Token savings:   {fmt_tokens(hints.get('token_savings_estimate', 0))}")
+
+
 def main():
     if not DB_PATH.exists():
         print("No state.db found. Run a session with hooks active first.")
@@ -41,66 +93,64 @@ def main():
     print(f"  context-raii Dashboard  —  {datetime.now().strftime('%H:%M:%S')}")
     print(f"{'='*60}")
 
+    rows = conn.execute(DASHBOARD_SQL).fetchall()
+    task_counts = {}
+    active = []
+    chunk_counts = {}
+    evictable_by_tool = []
+    edge_count = active_blocked = 0
+    for r in rows:
+        kind = r["kind"]
+        if kind == "task":
+            task_counts[r["k"]] = r["n"]
+        elif kind == "active":
+            active.append({"id": r["k"], "subject": r["label"]})
+        elif kind == "chunk":
+            chunk_counts[r["k"]] = (r["n"], r["tokens"])
+        elif kind == "edges":
+            edge_count = r["n"]
+        elif kind == "blocked":
+            active_blocked = r["n"]
+        else:
+            evictable_by_tool.append({"tool_name": r["k"], "n": r["n"], "tokens": r["tokens"]})
+
     # Task breakdown
-    tasks = conn.execute("SELECT status, COUNT(*) as n FROM tasks GROUP BY status").fetchall()
-    task_counts = {r["status"]: r["n"] for r in tasks}
     total_tasks = sum(task_counts.values())
     print(f"\nTASKS ({total_tasks} total)")
     for status in ("pending", "in_progress", "completed", "abandoned"):
         n = task_counts.get(status, 0)
-        bar = "█" * min(n, 30)
+        bar = BARS[min(n, 30)]
         print(f"  {status:<12} {n:>4}  {bar}")
 
     # Active tasks
-    active = conn.execute(
-        "SELECT id, subject FROM tasks WHERE status IN ('pending','in_progress') ORDER BY created_at"
-    ).fetchall()
     if active:
         print(f"\n  Active:")
         for t in active:
             print(f"    • {t['subject'][:55]}  (id={t['id'][:8]}…)")
 
     # Chunk breakdown
-    chunks = conn.execute(
-        "SELECT status, COUNT(*) as n, COALESCE(SUM(size_tokens),0) as tokens "
-        "FROM context_chunks GROUP BY status"
-    ).fetchall()
-    chunk_counts = {r["status"]: (r["n"], r["tokens"]) for r in chunks}
     total_chunks = sum(v[0] for v in chunk_counts.values())
     total_tokens = sum(v[1] for v in chunk_counts.values())
 
     print(f"\nCONTEXT CHUNKS ({total_chunks} total, {fmt_tokens(total_tokens)} tokens)")
     for status in ("fresh", "integrated", "evictable"):
         n, tokens = chunk_counts.get(status, (0, 0))
-        pct = int(100 * tokens / total_tokens) if total_tokens else 0
-        bar = "█" * (pct // 3)
+        pct = 100 * tokens // total_tokens if total_tokens else 0
+        bar = pct_bar(pct)
         print(f"  {status:<12} {n:>4} chunks  {fmt_tokens(tokens):>6} tokens  {pct:>3}%  {bar}")
 
     # Savings
     evictable_tokens = chunk_counts.get("evictable", (0, 0))[1]
     if total_tokens > 0:
-        savings_pct = int(100 * evictable_tokens / total_tokens)
+        savings_pct = 100 * evictable_tokens // total_tokens
         print(f"\n  Evictable savings: {fmt_tokens(evictable_tokens)} / {fmt_tokens(total_tokens)} tokens ({savings_pct}%)")
 
     # Reference graph
-    edge_count = conn.execute("SELECT COUNT(*) FROM reference_edges").fetchone()[0]
-    active_blocked = conn.execute(
-        """
-        SELECT COUNT(DISTINCT re.target_chunk_id)
-        FROM reference_edges re
-        JOIN tasks t ON t.id = re.source_task_id
-        WHERE t.status IN ('pending','in_progress')
-        """
-    ).fetchone()[0]
     print(f"\nREFERENCE GRAPH")
     print(f"  Total edges:         {edge_count}")
     print(f"  Active-blocked chunks: {active_blocked}  (cannot evict)")
 
     # Tool breakdown of evictable chunks
-    evictable_by_tool = conn.execute(
-        "SELECT tool_name, COUNT(*) as n, SUM(size_tokens) as tokens "
-        "FROM context_chunks WHERE status = 'evictable' GROUP BY tool_name ORDER BY tokens DESC"
-    ).fetchall()
     if evictable_by_tool:
         print(f"\nEVICTABLE BY TOOL")
         for r in evictable_by_tool:
@@ -108,13 +158,7 @@ def main():
             print(f"  {r['tool_name']:<14} {r['n']:>3} chunks  {fmt_tokens(r['tokens']):>6} tokens  {refetch}")
 
     # Compaction hints
-    if HINTS_PATH.exists():
-        hints = json.loads(HINTS_PATH.read_text())
-        generated = hints.get("generated_at", "")
-        print(f"\nLAST EVICTION HINTS  ({generated[:19]})")
-        print(f"  Safe to evict:   {len(hints.get('safe_to_evict', []))} chunks")
-        print(f"  Preserved:       {len(hints.get('critical_to_preserve', []))} chunks")
-        print(f"  Token savings:   {fmt_tokens(hints.get('token_savings_estimate', 0))}")
+    print_hints()
 
     # Compaction avoidance estimate
     # Claude Code typically compacts at ~80k tokens context window usage.
@@ -122,7 +166,7 @@ def main():
     COMPACT_THRESHOLD = 80_000
     saved = evictable_tokens
     if saved > 0:
-        runway_pct = int(100 * saved / COMPACT_THRESHOLD)
+        runway_pct = 100 * saved // COMPACT_THRESHOLD
         print(f"\nCOMPACTION AVOIDANCE ESTIMATE")
         print(f"  Evictable tokens extend context by ~{runway_pct}% of compaction threshold")
         print(f"  ({fmt_tokens(saved)} of ~{fmt_tokens(COMPACT_THRESHOLD)} threshold tokens recoverable)")
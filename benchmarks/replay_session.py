@@ -12,7 +12,6 @@ Run:
     python3 benchmarks/replay_session.py
 """
 
-import json
 import sqlite3
 import subprocess
 import sys
@@ -22,25 +21,30 @@ from pathlib import Path
 
 REPO = Path(__file__).resolve().parents[1]
 PYTHON = sys.executable
+sys.path.insert(0, str(REPO))
+
+from raii import jsonio
 
 # Use a fresh temp DB so this doesn't pollute the real state
 import os
 _tmpdir = Path(tempfile.mkdtemp())
 os.environ["RAII_TEST_DB_DIR"] = str(_tmpdir)  # hooks read this if set
 
+SHARED_BODY = "def shared(): pass\n" * 50        # ~2500 chars
+FEATURE_BODY = "def feature_x(): pass\n" * 100   # ~5000 chars
+
 
 def hook(script: str, event: dict) -> dict:
     proc = subprocess.run(
         [PYTHON, str(REPO / "hooks" / script)],
-        input=json.dumps(event),
+        input=jsonio.dumps(event),
         capture_output=True,
-        text=True,
         env={**os.environ, "RAII_DB_DIR": str(_tmpdir)},
     )
     if proc.returncode != 0:
-        print(f"[{script}] STDERR: {proc.stderr[:300]}")
+        print(f"[{script}] STDERR: {proc.stderr[:300].decode(errors='replace')}")
     out = proc.stdout.strip()
-    return json.loads(out) if out else {}
+    return jsonio.loads(out) if out else {}
 
 
 def tool_call(tool_name: str, tool_input: dict, tool_result: str, tool_use_id: str):
@@ -91,12 +95,12 @@ def main():
     # Task A reads two files
     tool_call("Read",
               {"file_path": "/src/shared.py"},
-              "def shared(): pass\n" * 50,   # ~2500 chars
+              SHARED_BODY,
               "tu-read-shared")
 
     tool_call("Read",
               {"file_path": "/src/feature_x.py"},
-              "def feature_x(): pass\n" * 100,  # ~5000 chars
+              FEATURE_BODY,
               "tu-read-feature-x")
 
     # Task A runs tests
@@ -120,7 +124,7 @@ def main():
     # Task B re-reads the shared file (same path → superseded)
     tool_call("Read",
               {"file_path": "/src/shared.py"},
-              "def shared(): pass\n" * 50,
+              SHARED_BODY,
               "tu-read-shared-b")
 
     # ------------------------------------------------------------------
@@ -6,14 +6,21 @@ and reports eviction metrics.
 Usage:
     python3 benchmarks/run_harness.py
     python3 benchmarks/run_harness.py --scenario sequential_clean
+    python3 benchmarks/run_harness.py --in-process
+    python3 benchmarks/run_harness.py --jobs 1
 """
 
 import argparse
+import contextlib
 import importlib
+import io
+import os
 import sys
 import tempfile
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Optional
 
 REPO = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(REPO))
@@ -37,7 +44,11 @@ def _check(label: str, value: float, lo: float, hi: float) -> bool:
     return ok
 
 
-def run_scenario(name: str) -> dict:
+def run_scenario(name: str, in_process: bool = False, work_dir: Optional[Path] = None) -> dict:
+    """
+    Run one scenario. With work_dir, the scenario reuses that directory
+    (resetting any previous scenario's state) instead of a fresh temp dir.
+    """
     mod = importlib.import_module(f"benchmarks.scenarios.{name}")
 
     print(f"\n{'═' * 60}")
@@ -45,9 +56,13 @@ def run_scenario(name: str) -> dict:
     print(f"  {mod.DESCRIPTION}")
     print(f"{'═' * 60}")
 
-    with tempfile.TemporaryDirectory() as tmp:
-        h = ScenarioHarness(Path(tmp), session_id=f"{name}-session")
-
+    with contextlib.ExitStack() as stack:
+        if work_dir is None:
+            work_dir = Path(stack.enter_context(tempfile.TemporaryDirectory()))
+        h = stack.enter_context(
+            ScenarioHarness(work_dir, session_id=f"{name}-session", in_process=in_process)
+        )
+        h.reset()
         t0 = time.monotonic()
         mod.run(h)
         elapsed = time.monotonic() - t0
@@ -79,6 +94,17 @@ def run_scenario(name: str) -> dict:
     return {"name": name, "metrics": m, "pass": all_pass, "elapsed": elapsed}
 
 
+def _run_captured(name: str, in_process: bool, root: Path) -> tuple:
+    """Run a scenario in a worker process, returning its result and report text."""
+    # One directory per worker process, reused by every scenario it runs.
+    work_dir = root / str(os.getpid())
+    work_dir.mkdir(exist_ok=True)
+    buf = io.StringIO()
+    with contextlib.redirect_stdout(buf):
+        r = run_scenario(name, in_process=in_process, work_dir=work_dir)
+    return r, buf.getvalue()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Run context-raii scenario benchmarks")
     parser.add_argument(
@@ -86,14 +112,38 @@ def main():
         choices=SCENARIOS,
         help="Run a single scenario (default: all)",
     )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="Call hook handlers directly instead of through worker processes",
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        help="Scenarios to run in parallel (default: one per scenario, up to CPU count)",
+    )
     args = parser.parse_args()
 
     to_run = [args.scenario] if args.scenario else SCENARIOS
+    jobs = args.jobs or min(len(to_run), os.cpu_count() or 1)
 
     results = []
-    for name in to_run:
-        r = run_scenario(name)
-        results.append(r)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        if jobs <= 1:
+            for name in to_run:
+                r = run_scenario(name, in_process=args.in_process, work_dir=root)
+                results.append(r)
+        else:
+            # Scenarios share no state; each report is printed whole, in order.
+            with ProcessPoolExecutor(max_workers=jobs) as ex:
+                futures = [
+                    ex.submit(_run_captured, name, args.in_process, root) for name in to_run
+                ]
+                for f in futures:
+                    r, report = f.result()
+                    print(report, end="")
+                    results.append(r)
 
     # Summary table
     print(f"\n\n{'═' * 60}")
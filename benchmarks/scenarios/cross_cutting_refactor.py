@@ -26,19 +26,17 @@ EXPECTED = {
 
 FILES = [f"/src/module_{i}.py" for i in range(10)]
 EDITED_FILES = FILES[4:]   # B edits the last 6 files that A read
+CONTENT_TEMPLATE = "# content of {0}\n" * 50
 
 
 def run(h):
     # Task A: reads all 10 files, still in_progress
-    h.task_create("ta", "Audit entire codebase")
-    h.task_update("ta", "in_progress")
-    for f in FILES:
-        h.read_file(f, f"# content of {f}\n" * 50)
+    h.task_start("ta", "Audit entire codebase")
+    h.read_files(FILES, CONTENT_TEMPLATE.format)
     h.bash("wc -l /src/*.py", "1200 total")
 
     # Task B starts (now current active task)
-    h.task_create("tb", "Refactor modules 4-9")
-    h.task_update("tb", "in_progress")
+    h.task_start("tb", "Refactor modules 4-9")
 
     # B edits 6 of the files A read — write-invalidation should fire
     for f in EDITED_FILES:
@@ -26,42 +26,44 @@ EXPECTED = {
     "refetch_rate": (0.0, 0.0),
 }
 
+# Files read during exploration, with their contents built once at import.
+MODULES = (
+    "/src/auth.py", "/src/session.py", "/src/middleware.py",
+    "/src/models/user.py", "/src/models/token.py",
+    "/src/routes/login.py", "/src/routes/logout.py",
+    "/src/utils/crypto.py", "/src/utils/jwt.py",
+    "/src/config.py", "/src/constants.py",
+    "/tests/test_auth.py", "/tests/conftest.py",
+    "/docs/auth_design.md", "/README.md",
+    "/src/permissions.py", "/src/roles.py", "/src/groups.py",
+    "/src/oauth/google.py", "/src/oauth/github.py",
+    "/src/oauth/base.py", "/src/oauth/utils.py",
+    "/src/db/models.py", "/src/db/migrations.py", "/src/db/connection.py",
+    "/src/api/v1/auth.py", "/src/api/v1/users.py", "/src/api/v1/tokens.py",
+    "/src/api/v2/auth.py", "/src/api/v2/users.py",
+    "/src/cache/redis.py", "/src/cache/local.py",
+    "/src/email/sender.py", "/src/email/templates.py",
+    "/src/audit/log.py", "/src/audit/events.py",
+    "/src/security/rate_limit.py", "/src/security/csrf.py",
+    "/src/security/headers.py", "/src/security/validator.py",
+    "/src/cli/admin.py", "/src/cli/manage.py",
+    "/src/tasks/cleanup.py", "/src/tasks/notifications.py",
+    "/tests/test_session.py", "/tests/test_middleware.py",
+    "/tests/test_permissions.py", "/tests/test_oauth.py",
+    "/tests/integration/test_login.py",
+    "/tests/integration/test_logout.py",
+    "/docs/security_model.md", "/docs/api_reference.md",
+    "/docs/deployment.md",
+)
+_READS = tuple((path, f"# {path} contents\n" * 40) for path in MODULES)
+
 
 def run(h):
-    h.task_create("explore", "Understand the authentication system")
-    h.task_update("explore", "in_progress")
+    h.task_start("explore", "Understand the authentication system")
 
     # Wide exploration — reading many files (55 > 50-call threshold)
-    modules = [
-        "/src/auth.py", "/src/session.py", "/src/middleware.py",
-        "/src/models/user.py", "/src/models/token.py",
-        "/src/routes/login.py", "/src/routes/logout.py",
-        "/src/utils/crypto.py", "/src/utils/jwt.py",
-        "/src/config.py", "/src/constants.py",
-        "/tests/test_auth.py", "/tests/conftest.py",
-        "/docs/auth_design.md", "/README.md",
-        "/src/permissions.py", "/src/roles.py", "/src/groups.py",
-        "/src/oauth/google.py", "/src/oauth/github.py",
-        "/src/oauth/base.py", "/src/oauth/utils.py",
-        "/src/db/models.py", "/src/db/migrations.py", "/src/db/connection.py",
-        "/src/api/v1/auth.py", "/src/api/v1/users.py", "/src/api/v1/tokens.py",
-        "/src/api/v2/auth.py", "/src/api/v2/users.py",
-        "/src/cache/redis.py", "/src/cache/local.py",
-        "/src/email/sender.py", "/src/email/templates.py",
-        "/src/audit/log.py", "/src/audit/events.py",
-        "/src/security/rate_limit.py", "/src/security/csrf.py",
-        "/src/security/headers.py", "/src/security/validator.py",
-        "/src/cli/admin.py", "/src/cli/manage.py",
-        "/src/tasks/cleanup.py", "/src/tasks/notifications.py",
-        "/tests/test_session.py", "/tests/test_middleware.py",
-        "/tests/test_permissions.py", "/tests/test_oauth.py",
-        "/tests/integration/test_login.py",
-        "/tests/integration/test_logout.py",
-        "/docs/security_model.md", "/docs/api_reference.md",
-        "/docs/deployment.md",
-    ]
-    for path in modules:
-        h.read_file(path, f"# {path} contents\n" * 40)
+    for path, content in _READS:
+        h.read_file(path, content)
 
     h.grep("def authenticate", "/src/", "auth.py:14: def authenticate()")
     h.bash("git log --oneline -10", "abc1234 Fix token expiry\ndef5678 Add MFA")
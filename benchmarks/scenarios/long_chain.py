@@ -32,6 +32,12 @@ EXPECTED = {
 
 TASK_IDS = ["chain-1", "chain-2", "chain-3", "chain-4", "chain-5"]
 
+# Each task reads 3 files unique to it; (path, content) built once at import.
+_READS = tuple(
+    tuple((f"/src/layer_{i}_{j}.py", f"# layer {i} module {j}\n" * 50) for j in range(3))
+    for i in range(len(TASK_IDS))
+)
+
 
 def run(h):
     # Create all tasks upfront with dependency chain declared
@@ -45,9 +51,8 @@ def run(h):
 
     for i, task_id in enumerate(TASK_IDS):
         h.task_update(task_id, "in_progress")
-        # Each task reads 3 files unique to it
-        for j in range(3):
-            h.read_file(f"/src/layer_{i}_{j}.py", f"# layer {i} module {j}\n" * 50)
+        for path, content in _READS[i]:
+            h.read_file(path, content)
         h.bash(f"pytest tests/layer_{i}/", f"{3 + i} passed")
         h.edit_file(f"/src/layer_{i}_main.py")
         h.task_update(task_id, "completed")
@@ -27,6 +27,11 @@ A_FILES = [f"/src/feature_a_{i}.py" for i in range(5)]
 B_FILES = [f"/src/feature_b_{i}.py" for i in range(5)]
 SHARED_FILE = "/src/shared_utils.py"
 
+# File bodies, built once and shared by every read that uses them.
+A_BODY = "# feature A module\n" * 50
+B_BODY = "# feature B module\n" * 50
+SHARED_BODY = "def shared_util(): pass\n" * 60
+
 
 def run(h):
     # Both tasks created upfront
@@ -36,16 +41,16 @@ def run(h):
     # Task A goes active, reads its files + the shared file
     h.task_update("ta", "in_progress")
     for f in A_FILES:
-        h.read_file(f, f"# feature A module\n" * 50)
-    h.read_file(SHARED_FILE, "def shared_util(): pass\n" * 60)
+        h.read_file(f, A_BODY)
+    h.read_file(SHARED_FILE, SHARED_BODY)
     h.bash("pytest tests/feature_a/", "8 passed")
 
     # Task B goes active (now current_active = B), reads its files + shared file
     # B's read of shared_utils supersedes A's read (same path, newer chunk)
     h.task_update("tb", "in_progress")
     for f in B_FILES:
-        h.read_file(f, f"# feature B module\n" * 50)
-    h.read_file(SHARED_FILE, "def shared_util(): pass\n" * 60)
+        h.read_file(f, B_BODY)
+    h.read_file(SHARED_FILE, SHARED_BODY)
     h.bash("pytest tests/feature_b/", "6 passed")
 
     # Task A completes:
@@ -18,30 +18,33 @@ EXPECTED = {
     "refetch_rate": (0.0, 0.05),
 }
 
+# File bodies, built once at import.
+AUTH_BODY = "def login(): pass\n" * 60
+MODELS_BODY = "class User: pass\n" * 60
+FORMS_BODY = "def validate(): pass\n" * 80
+SESSION_BODY = "SESSION_TTL = 3600\n" * 40
+
 
 def run(h):
     # Task 1: read two files, run tests, done
-    h.task_create("t1", "Add login endpoint")
-    h.task_update("t1", "in_progress")
-    h.read_file("/src/auth.py", "def login(): pass\n" * 60)
-    h.read_file("/src/models.py", "class User: pass\n" * 60)
+    h.task_start("t1", "Add login endpoint")
+    h.read_file("/src/auth.py", AUTH_BODY)
+    h.read_file("/src/models.py", MODELS_BODY)
     h.bash("pytest tests/auth/", "3 passed in 0.4s")
     h.edit_file("/src/auth.py")
     h.task_update("t1", "completed")
 
     # Task 2: grep, read, write, done
-    h.task_create("t2", "Add signup form validation")
-    h.task_update("t2", "in_progress")
+    h.task_start("t2", "Add signup form validation")
     h.grep("validate", "/src/forms.py", "forms.py:12: def validate()")
-    h.read_file("/src/forms.py", "def validate(): pass\n" * 80)
+    h.read_file("/src/forms.py", FORMS_BODY)
     h.edit_file("/src/forms.py")
     h.bash("npm run lint", "No issues found.")
     h.task_update("t2", "completed")
 
     # Task 3: explore + implement, done
-    h.task_create("t3", "Fix session timeout bug")
-    h.task_update("t3", "in_progress")
-    h.read_file("/src/session.py", "SESSION_TTL = 3600\n" * 40)
+    h.task_start("t3", "Fix session timeout bug")
+    h.read_file("/src/session.py", SESSION_BODY)
     h.bash("grep -r 'SESSION_TTL' .", "session.py:1")
     h.edit_file("/src/session.py")
     h.bash("pytest tests/session/", "5 passed in 0.7s")
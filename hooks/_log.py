@@ -0,0 +1,67 @@
+"""
+Logging setup shared by the hook scripts.
+
+Every hook logs a few INFO lines per call to DB_DIR/hooks.log. A plain
+FileHandler flushes after each record, i.e. one write() per line; a hook
+process is short-lived, so records are buffered in a MemoryHandler and
+written in one go at exit (or right away for ERROR and above).
+
+Each record carries the name of the hook that was running when it was
+logged, in a `hook` field. The worker and the in-process harness import
+every hook into one process, so the name can't be fixed in the formatter:
+handle() is wrapped with tagged(), which sets it for the call.
+"""
+
+import atexit
+import functools
+import logging
+from contextvars import ContextVar
+from logging.handlers import MemoryHandler
+
+from raii.storage import DB_DIR
+
+CAPACITY = 64
+
+_hook: ContextVar[str] = ContextVar("hook", default="-")
+
+
+class _HookFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.hook = _hook.get()
+        return True
+
+
+def setup(hook: str) -> None:
+    """
+    Send root logging to hooks.log. Records logged outside a tagged() call
+    (e.g. a script's main() failing to parse its event) are tagged `hook`.
+    Like logging.basicConfig, adds no handler if the root logger already has
+    one (e.g. another hook imported first into the same process).
+    """
+    _hook.set(hook)
+    root = logging.getLogger()
+    if root.handlers:
+        return
+    fh = logging.FileHandler(str(DB_DIR / "hooks.log"))
+    fh.setFormatter(
+        logging.Formatter("%(asctime)s [%(hook)s] %(levelname)s %(message)s")
+    )
+    mh = MemoryHandler(CAPACITY, flushLevel=logging.ERROR, target=fh)
+    mh.addFilter(_HookFilter())
+    root.addHandler(mh)
+    root.setLevel(logging.INFO)
+    atexit.register(mh.flush)
+
+
+def tagged(hook: str):
+    """Decorator: tag records logged during each call with `hook`."""
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            token = _hook.set(hook)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _hook.reset(token)
+        return inner
+    return wrap
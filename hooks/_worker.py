@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Long-lived hook worker for the benchmark harness.
+
+Claude Code spawns a fresh interpreter per hook call; for benchmarks that fire
+hundreds of calls, interpreter startup dwarfs the hook's own work. This worker
+imports the hook modules once and serves requests until the harness closes
+its end of the socket.
+
+    python3 hooks/_worker.py <fd>     # fd: inherited end of a socketpair
+
+Protocol (one request at a time), each message framed as a big-endian uint32
+byte length followed by that many bytes of JSON:
+  request:  {"hook": "pre_tool_use", "event": {...}}
+  response: the hook's output dict
+
+  batch:    {"batch": [{"hook": ..., "event": ...}, ...]}
+            -> {"results": [output, ...]}
+            Calls run in order. A post_tool_use call directly after a
+            pre_tool_use call that blocked is skipped (output {}), as Claude
+            Code would never run the tool.
+
+A hook that raises gets its traceback written to stderr and an empty {}
+response — the same thing the harness saw from a crashed one-shot process.
+"""
+
+import socket
+import struct
+import sys
+import traceback
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from hooks import post_tool_use, pre_compact, pre_tool_use, session_start
+from raii import jsonio
+
+HEADER = struct.Struct(">I")
+
+HOOKS = {
+    "pre_tool_use": pre_tool_use,
+    "post_tool_use": post_tool_use,
+    "pre_compact": pre_compact,
+    "session_start": session_start,
+}
+
+
+def run_one(hook: str, event: dict) -> dict:
+    try:
+        return HOOKS[hook].handle(event)
+    except Exception:
+        traceback.print_exc(file=sys.stderr)
+        return {}
+
+
+def run_batch(calls: list) -> list:
+    results = []
+    for call in calls:
+        if (
+            call["hook"] == "post_tool_use"
+            and results
+            and results[-1].get("decision") == "block"
+        ):
+            results.append({})
+            continue
+        results.append(run_one(call["hook"], call["event"]))
+    return results
+
+
+def recv_exact(sock: socket.socket, n: int):
+    """Read exactly n bytes, or return None if the peer closed the socket."""
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:])
+        if not k:
+            return None
+        got += k
+    return bytes(buf)
+
+
+def main():
+    sock = socket.socket(fileno=int(sys.argv[1]))
+    while True:
+        header = recv_exact(sock, HEADER.size)
+        if header is None:
+            break
+        body = recv_exact(sock, HEADER.unpack(header)[0])
+        if body is None:
+            break
+        try:
+            request = jsonio.loads(body)
+            if "batch" in request:
+                response = {"results": run_batch(request["batch"])}
+            else:
+                response = run_one(request["hook"], request["event"])
+        except Exception:
+            traceback.print_exc(file=sys.stderr)
+            response = {}
+        out = jsonio.dumps(response)
+        sock.sendall(HEADER.pack(len(out)) + out)
+
+
+if __name__ == "__main__":
+    main()
@@ -21,65 +21,61 @@ Hook event schema (Claude Code PostToolUse):
 import json
 import logging
 import sys
-from pathlib import Path
+from typing import Iterator
 
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+if not __package__:
+    # Run as a script, not via an installed entry point: make the repo
+    # root importable.
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from raii.task_registry import TaskRegistry
 from raii.context_tagger import ContextTagger
-from raii.eviction_engine import EvictionEngine
-from raii.compaction_advisor import CompactionAdvisor
-from raii.storage import DB_DIR, ensure_db
-
-DB_DIR.mkdir(parents=True, exist_ok=True)
-logging.basicConfig(
-    filename=str(DB_DIR / "hooks.log"),
-    level=logging.INFO,
-    format="%(asctime)s [post_tool_use] %(levelname)s %(message)s",
-)
-log = logging.getLogger(__name__)
+from raii import jsonio, pending_tag
+from hooks import _log
+from raii.storage import ensure_db
 
-PENDING_TAG_PATH = DB_DIR / "pending_tag.json"
+ensure_db()   # also creates DB_DIR, which the log file needs
+_log.setup("post_tool_use")
+log = logging.getLogger(__name__)
 
 
 def main():
-    ensure_db()
     try:
-        event = json.load(sys.stdin)
+        event = jsonio.loads(sys.stdin.buffer.read())
     except Exception as e:
         log.error("Failed to parse hook event: %s", e)
         sys.exit(0)
 
+    handle(event)
+    sys.exit(0)
+
+
+@_log.tagged("post_tool_use")
+def handle(event: dict) -> dict:
+    """Process one PostToolUse event. Returns an empty output dict."""
+    ensure_db()
+
     tool_name = event.get("tool_name", "")
     tool_input = event.get("tool_input", {})
     tool_use_id = event.get("tool_use_id", "")
     session_id = event.get("session_id", "")
     tool_response = event.get("tool_response", "")
 
-    result_text = _extract_text(tool_response)
+    result_text = _extract_text(tool_name, tool_response)
 
     log.info("post_tool_use: tool=%s id=%s result_len=%d", tool_name, tool_use_id, len(result_text))
 
-    # Read pending tag written by pre_tool_use
-    active_task_id = _read_pending_task_id(tool_use_id)
-
     registry = TaskRegistry()
     tagger = ContextTagger(registry)
 
     # TaskCreate and TaskUpdate(in_progress) fire before the task is active,
-    # so pre_tool_use captures active_task_id=None. Override here using the
-    # task ID from the input so these metadata chunks aren't left as orphans.
+    # so pre_tool_use can't have captured it. Tag these metadata chunks with
+    # the task ID from the input so they aren't left as orphans; only other
+    # calls need the pending tag written by pre_tool_use.
+    active_task_id = pending_tag.self_tagged_task_id(tool_name, tool_input)
     if active_task_id is None:
-        if tool_name == "TaskCreate":
-            active_task_id = tool_input.get("id") or tool_input.get("task_id")
-        elif tool_name == "TaskUpdate":
-            new_status = tool_input.get("status")
-            if new_status == "in_progress":
-                active_task_id = (
-                    tool_input.get("taskId")
-                    or tool_input.get("id")
-                    or tool_input.get("task_id")
-                )
+        active_task_id = _read_pending_task_id(tool_use_id)
 
     # ------------------------------------------------------------------
     # Tag the result as a ContextChunk
@@ -108,6 +104,7 @@ def main():
         file_path = tool_input.get("file_path")
         if file_path:
             try:
+                from raii.compaction_advisor import CompactionAdvisor
                 CompactionAdvisor().record_refetch(file_path)
             except Exception as e:
                 log.debug("Compliance refetch check failed: %s", e)
@@ -116,10 +113,12 @@ def main():
     # Write-invalidation: stale reads of any edited file
     # ------------------------------------------------------------------
     if tool_name in ("Edit", "Write", "MultiEdit"):
-        for path in _extract_edited_paths(tool_input):
-            n = tagger.invalidate_reads_for_path(path)
-            if n > 0:
-                log.info("Write-invalidated %d Read chunk(s) for %s", n, path)
+        paths = list(_extract_edited_paths(tool_input))
+        if paths:
+            n = tagger.invalidate_reads_for_paths(paths)
+            # Skip the join when INFO is off.
+            if n > 0 and log.isEnabledFor(logging.INFO):
+                log.info("Write-invalidated %d Read chunk(s) for %s", n, ", ".join(paths))
 
     # ------------------------------------------------------------------
     # On task completion: run eviction engine
@@ -133,81 +132,119 @@ def main():
                 or tool_input.get("task_id")
             )
             log.info("Task %s completed — running eviction engine", task_id)
+            from raii.eviction_engine import EvictionEngine
             engine = EvictionEngine(registry=registry, tagger=tagger)
             report = engine.run(update_db=True)
-            log.info(
-                "Eviction after task %s: %s",
-                task_id,
-                report.summary(),
-            )
+            # summary() is built eagerly as an argument; skip it when INFO is off.
+            if log.isEnabledFor(logging.INFO):
+                log.info(
+                    "Eviction after task %s: %s",
+                    task_id,
+                    report.summary(),
+                )
 
-    sys.exit(0)
+    return {}
 
 
-def _extract_text(response) -> str:
+def _extract_text(tool_name: str, response) -> str:
     """
-    Extract a plain-text representation from a tool_response dict.
+    Extract a plain-text representation from a tool_response.
     The structure varies by tool:
       Read:       {'type': 'text', 'file': {'filePath': ..., 'content': ...}}
       Bash:       {'stdout': ..., 'stderr': ..., 'interrupted': bool, ...}
       Edit/Write: {'filePath': ..., 'oldString': ..., 'newString': ...}
       Grep/Glob:  {'type': 'text', ...} or similar
       other:      fall back to JSON dump
+    Known tools go straight to their extractor; anything else, or a response
+    that doesn't have the expected shape, takes the generic path.
     """
-    if isinstance(response, str):
+    # Decoded events only hold exact str/dict/list (never subclasses), so
+    # `type() is` checks are enough here and in _extract_generic.
+    t = type(response)
+    if t is str:
         return response
-    if isinstance(response, list):
-        return "\n".join(_extract_text(item) for item in response)
-    if not isinstance(response, dict):
-        return str(response) if response is not None else ""
-
-    # Read tool
-    if "file" in response and isinstance(response["file"], dict):
-        return response["file"].get("content", "")
+    if t is dict:
+        extractor = _EXTRACTORS.get(tool_name)
+        if extractor is not None:
+            text = extractor(response)
+            if text is not None:
+                return text
+    return _extract_generic(response)
+
+
+def _extract_read(response: dict):
+    file = response.get("file")
+    return file.get("content", "") if type(file) is dict else None
+
+
+def _extract_bash(response: dict):
+    if "stdout" not in response and "stderr" not in response:
+        return None
+    parts = []
+    if response.get("stdout"):
+        parts.append(response["stdout"])
+    if response.get("stderr"):
+        parts.append(response["stderr"])
+    return "\n".join(parts)
+
+
+def _extract_edit(response: dict):
+    # Record the file path + size as the meaningful signal
+    if "filePath" not in response:
+        return None
+    new = response.get("newString", response.get("content", ""))
+    return new if new else f"edited:{response['filePath']}"
+
+
+def _extract_text_block(response: dict):
+    return response.get("text")
+
+
+_EXTRACTORS = {
+    "Read": _extract_read,
+    "Bash": _extract_bash,
+    "Edit": _extract_edit,
+    "Write": _extract_edit,
+    "MultiEdit": _extract_edit,
+    "Grep": _extract_text_block,
+    "Glob": _extract_text_block,
+}
 
-    # Bash tool
-    if "stdout" in response or "stderr" in response:
-        parts = []
-        if response.get("stdout"):
-            parts.append(response["stdout"])
-        if response.get("stderr"):
-            parts.append(response["stderr"])
-        return "\n".join(parts)
 
-    # Edit/Write — record the file path + size as the meaningful signal
-    if "filePath" in response:
-        new = response.get("newString", response.get("content", ""))
-        return new if new else f"edited:{response['filePath']}"
+def _extract_generic(response) -> str:
+    t = type(response)
+    if t is str:
+        return response
+    if t is list:
+        return "\n".join(_extract_generic(item) for item in response)
+    if t is not dict:
+        return str(response) if response is not None else ""
 
-    # Generic text block
-    if "text" in response:
-        return response["text"]
+    for extractor in (_extract_read, _extract_bash, _extract_edit, _extract_text_block):
+        text = extractor(response)
+        if text is not None:
+            return text
 
     return json.dumps(response)
 
 
-def _extract_edited_paths(tool_input: dict) -> list:
-    """Extract all file paths touched by an Edit, Write, or MultiEdit call."""
-    paths = []
+def _extract_edited_paths(tool_input: dict) -> Iterator[str]:
+    """Yield all file paths touched by an Edit, Write, or MultiEdit call."""
     if "file_path" in tool_input:
-        paths.append(tool_input["file_path"])
+        yield tool_input["file_path"]
     # MultiEdit passes a list of edits, each with their own file_path
     for edit in tool_input.get("edits", []):
         if "file_path" in edit:
-            paths.append(edit["file_path"])
-    return paths
+            yield edit["file_path"]
 
 
 def _read_pending_task_id(tool_use_id: str) -> str | None:
     """
     Read the pending tag written by pre_tool_use for this tool_use_id.
-    Falls back to None if the file is missing or mismatched.
+    Falls back to None if there is no tag or it belongs to another call.
     """
     try:
-        if PENDING_TAG_PATH.exists():
-            data = json.loads(PENDING_TAG_PATH.read_text())
-            if data.get("tool_use_id") == tool_use_id:
-                return data.get("active_task_id")
+        return pending_tag.read(tool_use_id)
     except Exception as e:
         log.warning("Could not read pending tag: %s", e)
     return None
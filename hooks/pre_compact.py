@@ -21,35 +21,48 @@ Output JSON to stdout:
 }
 """
 
-import json
 import logging
 import sys
-from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+if not __package__:
+    # Run as a script, not via an installed entry point: make the repo
+    # root importable.
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from raii.compaction_advisor import CompactionAdvisor
-from raii.storage import DB_DIR, ensure_db
-
-DB_DIR.mkdir(parents=True, exist_ok=True)
-logging.basicConfig(
-    filename=str(DB_DIR / "hooks.log"),
-    level=logging.INFO,
-    format="%(asctime)s [pre_compact] %(levelname)s %(message)s",
-)
+from raii import jsonio
+from hooks import _log
+from raii.storage import ensure_db
+
+ensure_db()   # also creates DB_DIR, which the log file needs
+_log.setup("pre_compact")
 log = logging.getLogger(__name__)
 
 
 def main():
-    ensure_db()
     try:
-        event = json.load(sys.stdin)
+        event = jsonio.loads(sys.stdin.buffer.read())
     except Exception as e:
         log.error("Failed to parse hook event: %s", e)
         # Output empty context and continue
-        print(json.dumps({"additionalContext": ""}))
+        _write({"additionalContext": ""})
         sys.exit(0)
 
+    _write(handle(event))
+    sys.exit(0)
+
+
+def _write(output: dict) -> None:
+    sys.stdout.buffer.write(jsonio.dumps(output) + b"\n")
+    sys.stdout.flush()
+
+
+@_log.tagged("pre_compact")
+def handle(event: dict) -> dict:
+    """Process one PreCompact event and return the hook output dict."""
+    ensure_db()
+
     trigger = event.get("trigger", "unknown")
     context_tokens = event.get("context_window_tokens", 0)
     log.info("pre_compact fired: trigger=%s context_tokens=%d", trigger, context_tokens)
@@ -64,9 +77,7 @@ def main():
         log.exception("Error generating hints: %s", e)
         guidance = ""
 
-    output = {"additionalContext": guidance}
-    print(json.dumps(output))
-    sys.exit(0)
+    return {"additionalContext": guidance}
 
 
 if __name__ == "__main__":
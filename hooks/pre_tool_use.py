@@ -20,38 +20,48 @@ Hook event schema (Claude Code PreToolUse):
 Output: JSON to stdout (optional additionalContext / decision).
 """
 
-import json
 import logging
 import sys
-from pathlib import Path
 
-# Allow running from the repo root without installing
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+if not __package__:
+    # Run as a script, not via an installed entry point: make the repo
+    # root importable.
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from raii.task_registry import TaskRegistry
-from raii.storage import DB_DIR, ensure_db
-
-DB_DIR.mkdir(parents=True, exist_ok=True)
-logging.basicConfig(
-    filename=str(DB_DIR / "hooks.log"),
-    level=logging.INFO,
-    format="%(asctime)s [pre_tool_use] %(levelname)s %(message)s",
-)
-log = logging.getLogger(__name__)
+from raii import jsonio, pending_tag
+from hooks import _log
+from raii.storage import ensure_db, get_conn
 
-PENDING_TAG_PATH = DB_DIR / "pending_tag.json"
+ensure_db()   # also creates DB_DIR, which the log file needs
+_log.setup("pre_tool_use")
+log = logging.getLogger(__name__)
 
 WORK_TOOLS = frozenset({"Edit", "Write", "Bash", "MultiEdit"})
 
 
 def main():
-    ensure_db()
     try:
-        event = json.load(sys.stdin)
+        event = jsonio.loads(sys.stdin.buffer.read())
     except Exception as e:
         log.error("Failed to parse hook event: %s", e)
         sys.exit(0)
 
+    _write(handle(event))
+    sys.exit(0)
+
+
+def _write(output: dict) -> None:
+    sys.stdout.buffer.write(jsonio.dumps(output) + b"\n")
+    sys.stdout.flush()
+
+
+@_log.tagged("pre_tool_use")
+def handle(event: dict) -> dict:
+    """Process one PreToolUse event and return the hook output dict."""
+    ensure_db()
+
     tool_name = event.get("tool_name", "")
     tool_input = event.get("tool_input", {})
     tool_use_id = event.get("tool_use_id", "")
@@ -64,28 +74,21 @@ def main():
     # ------------------------------------------------------------------
     # Handle task lifecycle tools
     # ------------------------------------------------------------------
-    if tool_name == "TaskCreate":
-        _handle_task_create(registry, tool_input)
+    handler = _LIFECYCLE_HANDLERS.get(tool_name)
+    if handler is not None:
+        handler(registry, tool_input)
 
-    elif tool_name == "TaskUpdate":
-        _handle_task_update(registry, tool_input)
-
-    elif tool_name == "TodoWrite":
-        _handle_todo_write(registry, tool_input)
+    # TaskCreate / TaskUpdate(in_progress) with a task id are tagged from
+    # tool_input by post_tool_use, which never reads their pending tag. They
+    # aren't work tools either, so the active task isn't needed at all.
+    if pending_tag.self_tagged_task_id(tool_name, tool_input) is not None:
+        return {}
 
     # ------------------------------------------------------------------
     # Write a pending tag so post_tool_use knows which task to associate
     # ------------------------------------------------------------------
     active_task = registry.get_current_active()
-    pending = {
-        "tool_use_id": tool_use_id,
-        "tool_name": tool_name,
-        "tool_input": tool_input,
-        "session_id": session_id,
-        "active_task_id": active_task.id if active_task else None,
-    }
-    DB_DIR.mkdir(parents=True, exist_ok=True)
-    PENDING_TAG_PATH.write_text(json.dumps(pending))
+    pending_tag.write(tool_use_id, active_task.id if active_task else None)
 
     # ------------------------------------------------------------------
     # Enforce task hygiene: always block work tools if no active task.
@@ -99,8 +102,7 @@ def main():
         )
         log.info("Blocked %s — no active task (session %s)", tool_name, session_id)
 
-    print(json.dumps(output))
-    sys.exit(0)
+    return output
 
 
 def _handle_task_create(registry: TaskRegistry, tool_input: dict):
@@ -139,21 +141,30 @@ def _handle_task_update(registry: TaskRegistry, tool_input: dict):
 
 def _handle_todo_write(registry: TaskRegistry, tool_input: dict):
     todos = tool_input.get("todos", [])
-    for todo in todos:
-        task_id = todo.get("id")
-        if not task_id:
-            continue
-        existing = registry.get(task_id)
-        status = todo.get("status", "pending")
-        subject = todo.get("content", todo.get("subject", "unknown"))
-        if existing is None:
-            registry.create(id=task_id, subject=subject)
-        registry.update_status(task_id, status)
-        for dep_id in todo.get("dependsOn", []):
-            registry.add_dependency(task_id, dep_id)
-            log.info("TodoWrite dependency: %s → %s", task_id, dep_id)
+    # One transaction for the whole list rather than one per registry call.
+    with get_conn(write=True):
+        for todo in todos:
+            task_id = todo.get("id")
+            if not task_id:
+                continue
+            existing = registry.get(task_id)
+            status = todo.get("status", "pending")
+            subject = todo.get("content", todo.get("subject", "unknown"))
+            if existing is None:
+                registry.create(id=task_id, subject=subject)
+            registry.update_status(task_id, status)
+            for dep_id in todo.get("dependsOn", []):
+                registry.add_dependency(task_id, dep_id)
+                log.info("TodoWrite dependency: %s → %s", task_id, dep_id)
     log.info("TodoWrite: processed %d todos", len(todos))
 
 
+_LIFECYCLE_HANDLERS = {
+    "TaskCreate": _handle_task_create,
+    "TaskUpdate": _handle_task_update,
+    "TodoWrite": _handle_todo_write,
+}
+
+
 if __name__ == "__main__":
     main()
@@ -9,38 +9,91 @@ Wire this up INSTEAD OF the real hooks first:
   "SessionStart":[{"hooks": [{"type": "command", "command": "python3 ~/context-raii/hooks/schema_logger.py session_start"}]}]
 
 Run a session, then inspect:
-  cat ~/.claude/raii/schema_samples.jsonl | python3 -m json.tool | less
+  python3 ~/context-raii/hooks/schema_logger.py --dump | python3 -m json.tool --json-lines | less
+
+Each event is appended to schema_samples.bin as one frame, written with a
+single write() and without re-encoding the event:
+    <IdI  len(hook name), unix timestamp, len(event)
+    ...   hook name bytes, then the raw stdin bytes of the event
+The record fields (keys, tool_result_type, ...) are derived when dumping.
 """
 
-import json
+import os
+import struct
 import sys
 from datetime import datetime, timezone
 from pathlib import Path
 
-LOG = Path.home() / ".claude" / "raii" / "schema_samples.jsonl"
-LOG.parent.mkdir(parents=True, exist_ok=True)
-
-hook_name = sys.argv[1] if len(sys.argv) > 1 else "unknown"
-
-try:
-    event = json.load(sys.stdin)
-except Exception as e:
-    event = {"_parse_error": str(e)}
-
-record = {
-    "hook": hook_name,
-    "timestamp": datetime.now(timezone.utc).isoformat(),
-    "event": event,
-    # Top-level keys present
-    "keys": list(event.keys()) if isinstance(event, dict) else [],
-    # tool_response type and structure (actual field name in Claude Code)
-    "tool_result_type": type(event.get("tool_response")).__name__ if "tool_response" in event else None,
-    "tool_result_preview": str(event.get("tool_response", ""))[:200] if "tool_response" in event else None,
-}
-
-with open(LOG, "a") as f:
-    f.write(json.dumps(record) + "\n")
-
-# Pass through — don't block the tool call
-print(json.dumps({"additionalContext": ""}))
-sys.exit(0)
+if not __package__:
+    # Run as a script, not via an installed entry point: make the repo
+    # root importable.
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from raii import jsonio
+
+LOG = Path.home() / ".claude" / "raii" / "schema_samples.bin"
+
+FRAME = struct.Struct("<IdI")
+
+
+def log_event(hook_name: str, data: bytes, timestamp: float) -> None:
+    """Append one raw event to LOG."""
+    name = hook_name.encode()
+    fd = os.open(LOG, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, FRAME.pack(len(name), timestamp, len(data)) + name + data)
+    finally:
+        os.close(fd)
+
+
+def iter_samples(path: Path = LOG):
+    """Yield one record dict per logged event, oldest first."""
+    if not path.exists():
+        return
+    buf = path.read_bytes()
+    pos = 0
+    while pos + FRAME.size <= len(buf):
+        name_len, timestamp, data_len = FRAME.unpack_from(buf, pos)
+        pos += FRAME.size
+        hook_name = buf[pos:pos + name_len].decode()
+        data = buf[pos + name_len:pos + name_len + data_len]
+        pos += name_len + data_len
+        yield _record(hook_name, timestamp, data)
+
+
+def _record(hook_name: str, timestamp: float, data: bytes) -> dict:
+    try:
+        event = jsonio.loads(data)
+    except Exception as e:
+        event = {"_parse_error": str(e)}
+    return {
+        "hook": hook_name,
+        "timestamp": datetime.fromtimestamp(timestamp, timezone.utc).isoformat(),
+        "event": event,
+        # Top-level keys present
+        "keys": list(event.keys()) if isinstance(event, dict) else [],
+        # tool_response type and structure (actual field name in Claude Code)
+        "tool_result_type": type(event.get("tool_response")).__name__ if "tool_response" in event else None,
+        "tool_result_preview": str(event.get("tool_response", ""))[:200] if "tool_response" in event else None,
+    }
+
+
+def main():
+    hook_name = sys.argv[1] if len(sys.argv) > 1 else "unknown"
+
+    if hook_name == "--dump":
+        for record in iter_samples():
+            sys.stdout.buffer.write(jsonio.dumps(record) + b"\n")
+        return
+
+    LOG.parent.mkdir(parents=True, exist_ok=True)
+    log_event(hook_name, sys.stdin.buffer.read(), datetime.now(timezone.utc).timestamp())
+
+    # Pass through — don't block the tool call
+    sys.stdout.buffer.write(jsonio.dumps({"additionalContext": ""}) + b"\n")
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
+    sys.exit(0)
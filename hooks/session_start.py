@@ -20,36 +20,48 @@ Output JSON to stdout:
 }
 """
 
-import json
 import logging
 import sys
-from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+if not __package__:
+    # Run as a script, not via an installed entry point: make the repo
+    # root importable.
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
-from raii.task_registry import TaskRegistry
-from raii.context_tagger import ContextTagger
-from raii.compaction_advisor import CompactionAdvisor
-from raii.storage import DB_DIR, ensure_db
+# TaskRegistry, ContextTagger and CompactionAdvisor are imported only on the
+# source == "compact" path; a plain startup never touches them.
+from raii import jsonio
+from hooks import _log
+from raii.storage import ensure_db
 
-DB_DIR.mkdir(parents=True, exist_ok=True)
-logging.basicConfig(
-    filename=str(DB_DIR / "hooks.log"),
-    level=logging.INFO,
-    format="%(asctime)s [session_start] %(levelname)s %(message)s",
-)
+ensure_db()   # also creates DB_DIR, which the log file needs
+_log.setup("session_start")
 log = logging.getLogger(__name__)
 
 
 def main():
-    ensure_db()
     try:
-        event = json.load(sys.stdin)
+        event = jsonio.loads(sys.stdin.buffer.read())
     except Exception as e:
         log.error("Failed to parse hook event: %s", e)
-        print(json.dumps({"additionalContext": ""}))
+        _write({"additionalContext": ""})
         sys.exit(0)
 
+    _write(handle(event))
+    sys.exit(0)
+
+
+def _write(output: dict) -> None:
+    sys.stdout.buffer.write(jsonio.dumps(output) + b"\n")
+    sys.stdout.flush()
+
+
+@_log.tagged("session_start")
+def handle(event: dict) -> dict:
+    """Process one SessionStart event and return the hook output dict."""
+    ensure_db()
+
     source = event.get("source", "startup")
     session_id = event.get("session_id", "")
     log.info("session_start: source=%s session_id=%s", source, session_id)
@@ -70,18 +82,19 @@ def main():
         _log_compaction_event(session_id)
         log.info("Injecting post-compaction summary")
 
-    print(json.dumps({"additionalContext": "\n\n".join(parts)}))
-    sys.exit(0)
+    return {"additionalContext": "\n\n".join(parts)}
 
 
 def _build_post_compaction_summary() -> str:
+    from raii.task_registry import TaskRegistry
+    from raii.context_tagger import ContextTagger
+    from raii.compaction_advisor import CompactionAdvisor
+
     registry = TaskRegistry()
     tagger = ContextTagger(registry)
     advisor = CompactionAdvisor()
 
-    all_tasks = registry.list_all()
-    active_tasks = registry.list_active()
-    completed_tasks = [t for t in all_tasks if t.is_complete()]
+    active_tasks, completed_count, recent_completed = registry.session_summary(recent=5)
 
     all_chunks = tagger.list_all()
     evictable = [c for c in all_chunks if c.status == "evictable"]
@@ -94,7 +107,7 @@ def _build_post_compaction_summary() -> str:
     lines = [
         "=== RAII Context-RAII State Summary (post-compaction) ===",
         "",
-        f"Tasks: {len(active_tasks)} active, {len(completed_tasks)} completed",
+        f"Tasks: {len(active_tasks)} active, {completed_count} completed",
         "",
     ]
 
@@ -104,10 +117,9 @@ def _build_post_compaction_summary() -> str:
             lines.append(f"  [{t.status.upper()}] {t.subject} (id={t.id})")
         lines.append("")
 
-    if completed_tasks:
+    if recent_completed:
         lines.append("RECENTLY COMPLETED TASKS (context may be minimal):")
-        # Show last 5 completed
-        for t in sorted(completed_tasks, key=lambda x: x.completed_at or "", reverse=True)[:5]:
+        for t in recent_completed:
             lines.append(f"  [DONE] {t.subject} (id={t.id})")
         lines.append("")
 
@@ -130,6 +142,7 @@ def _log_compaction_event(session_id: str) -> None:
     PostToolUse can track re-fetches in the new session as a compliance signal.
     """
     try:
+        from raii.compaction_advisor import CompactionAdvisor
         advisor = CompactionAdvisor()
         hints = advisor.read_hints()
         if hints is None:
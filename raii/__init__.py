@@ -1,22 +1,34 @@
 """context-raii: Task-scoped context management for Claude Code."""
 
-from .storage import ensure_db, get_conn
-from .task_registry import Task, TaskRegistry
-from .context_tagger import ContextChunk, ContextTagger
-from .reference_graph import ReferenceEdge, ReferenceGraph
-from .eviction_engine import EvictionEngine, EvictionReport
-from .compaction_advisor import CompactionAdvisor
+import importlib
 
-__all__ = [
-    "ensure_db",
-    "get_conn",
-    "Task",
-    "TaskRegistry",
-    "ContextChunk",
-    "ContextTagger",
-    "ReferenceEdge",
-    "ReferenceGraph",
-    "EvictionEngine",
-    "EvictionReport",
-    "CompactionAdvisor",
-]
+# Public names are resolved on first access (PEP 562) so that a hook importing
+# one submodule doesn't pay for loading the whole package on every call.
+_EXPORTS = {
+    "ensure_db": "storage",
+    "get_conn": "storage",
+    "Task": "task_registry",
+    "TaskRegistry": "task_registry",
+    "ContextChunk": "context_tagger",
+    "ContextTagger": "context_tagger",
+    "ReferenceEdge": "reference_graph",
+    "ReferenceGraph": "reference_graph",
+    "EvictionEngine": "eviction_engine",
+    "EvictionReport": "eviction_engine",
+    "CompactionAdvisor": "compaction_advisor",
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
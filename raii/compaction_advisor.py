@@ -5,10 +5,9 @@ Writes ~/.claude/raii/eviction_hints.json for the compaction summary to consume.
 
 from __future__ import annotations
 
-import json
 import logging
+import os
 from dataclasses import asdict
-from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
 
@@ -16,16 +15,69 @@ from .eviction_engine import EvictionEngine, EvictionReport
 from .task_registry import TaskRegistry
 from .context_tagger import ContextTagger
 from .reference_graph import ReferenceGraph
-from .storage import DB_DIR, get_conn
+from . import jsonio
+from .storage import DB_DIR, get_conn, utc_now
 
 log = logging.getLogger(__name__)
 
 HINTS_PATH = DB_DIR / "eviction_hints.json"
 COMPLIANCE_MONITOR_PATH = DB_DIR / "compliance_monitor.json"
 
+# How many chunks of each list the guidance text spells out.
+_GUIDANCE_EVICTABLE_CAP = 20
+_GUIDANCE_PRESERVED_CAP = 10
 
-def _now() -> str:
-    return datetime.now(timezone.utc).isoformat()
+
+def _write_json(path: Path, obj) -> None:
+    """
+    Write obj as indented JSON via a temp file and os.replace, so a hook
+    reading path concurrently sees either the old file or the new one.
+    """
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(jsonio.dumps_indent(obj))
+    os.replace(tmp, path)
+
+
+# What generate_hints() writes to HINTS_PATH when it has nothing to report.
+EMPTY_HINTS = {"empty": True}
+
+
+def _empty_hints() -> dict:
+    return {
+        "generated_at": None,
+        "token_savings_estimate": 0,
+        "safe_to_evict": [],
+        "critical_to_preserve": [],
+        "active_tasks_summary": [],
+        "compaction_guidance": "",
+    }
+
+
+def _read_json(path: Path):
+    return jsonio.loads(path.read_bytes())
+
+
+# What record_refetch needs from compliance_monitor.json, by path:
+# (stat key, (event_id, evictable paths, preserved paths)). The monitor is
+# rewritten with os.replace, so a new file always has a new inode.
+_monitor_cache: dict[Path, tuple[tuple, tuple]] = {}
+
+
+def _monitor_paths(path: Path) -> tuple:
+    """(event_id, evictable paths, preserved paths), parsed once per version of path."""
+    st = os.stat(path)
+    key = (st.st_ino, st.st_mtime_ns, st.st_size)
+    hit = _monitor_cache.get(path)
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    monitor = _read_json(path)
+    value = (
+        monitor.get("compaction_event_id"),
+        frozenset(monitor.get("evictable_file_paths", [])),
+        frozenset(monitor.get("preserved_file_paths", [])),
+    )
+    _monitor_cache[path] = (key, value)
+    return value
 
 
 class CompactionAdvisor:
@@ -48,43 +100,79 @@ class CompactionAdvisor:
         self._registry = registry or TaskRegistry()
 
     def generate_hints(self, update_db: bool = True) -> dict:
-        report = self._engine.run(update_db=update_db)
-        active_tasks = self._registry.list_active()
+        # The eviction run and the active-task read share one transaction,
+        # so the hints describe a single state of the DB.
+        with get_conn(write=update_db):
+            report = self._engine.run(update_db=update_db)
+            active_tasks = self._registry.list_active()
+        reasons = report.reasons
+
+        # One pass per list builds both the JSON entries and the guidance
+        # lines; guidance only shows the first few chunks of each list.
+        safe_to_evict = []
+        evictable_lines = []
+        for i, c in enumerate(report.evictable_chunks):
+            safe_to_evict.append({
+                "chunk_id": c.id,
+                "tool_name": c.tool_name,
+                "size_tokens": c.size_tokens,
+                "is_refetchable": c.is_refetchable,
+                "reason": reasons.get(c.id, "evictable"),
+            })
+            if i < _GUIDANCE_EVICTABLE_CAP:
+                refetch = " [re-fetchable]" if c.is_refetchable else ""
+                evictable_lines.append(
+                    f"  • {c.tool_name} result {c.short_id}…{refetch} "
+                    f"({c.size_tokens} tokens)"
+                )
+
+        critical_to_preserve = []
+        preserved_lines = []
+        for i, c in enumerate(report.preserved_chunks):
+            reason = reasons.get(c.id)
+            critical_to_preserve.append({
+                "chunk_id": c.id,
+                "tool_name": c.tool_name,
+                "size_tokens": c.size_tokens,
+                "reason": "preserved" if reason is None else reason,
+            })
+            if i < _GUIDANCE_PRESERVED_CAP:
+                preserved_lines.append(
+                    f"  • {c.tool_name} result {c.short_id}… "
+                    f"({c.size_tokens} tokens) — {'?' if reason is None else reason}"
+                )
+
+        active_tasks_summary = []
+        task_lines = []
+        for t in active_tasks:
+            active_tasks_summary.append({
+                "id": t.id,
+                "subject": t.subject,
+                "status": t.status,
+                "chunk_count": len(t.context_chunk_ids),
+            })
+            task_lines.append(f"  • [{t.status.upper()}] {t.subject} (id={t.id})")
 
         hints = {
-            "generated_at": _now(),
+            "generated_at": utc_now(),
             "token_savings_estimate": report.total_evictable_tokens,
-            "safe_to_evict": [
-                {
-                    "chunk_id": c.id,
-                    "tool_name": c.tool_name,
-                    "size_tokens": c.size_tokens,
-                    "is_refetchable": c.is_refetchable,
-                    "reason": report.reasons.get(c.id, "evictable"),
-                }
-                for c in report.evictable_chunks
-            ],
-            "critical_to_preserve": [
-                {
-                    "chunk_id": c.id,
-                    "tool_name": c.tool_name,
-                    "size_tokens": c.size_tokens,
-                    "reason": report.reasons.get(c.id, "preserved"),
-                }
-                for c in report.preserved_chunks
-            ],
-            "active_tasks_summary": [
-                {
-                    "id": t.id,
-                    "subject": t.subject,
-                    "status": t.status,
-                    "chunk_count": len(t.context_chunk_ids),
-                }
-                for t in active_tasks
-            ],
-            "compaction_guidance": self._build_guidance(report, active_tasks),
+            "safe_to_evict": safe_to_evict,
+            "critical_to_preserve": critical_to_preserve,
+            "active_tasks_summary": active_tasks_summary,
+            "compaction_guidance": self._build_guidance(
+                report, task_lines, evictable_lines, preserved_lines
+            ),
         }
 
+        if not (safe_to_evict or critical_to_preserve or active_tasks_summary):
+            # Nothing to hint about: write the EMPTY_HINTS marker instead of
+            # the full structure (replacing any older hints), so read_hints()
+            # can tell "ran with nothing to report" from "PreCompact never ran".
+            DB_DIR.mkdir(parents=True, exist_ok=True)
+            _write_json(HINTS_PATH, EMPTY_HINTS)
+            log.info("No eviction hints to write")
+            return hints
+
         self._write_hints(hints)
         log.info(
             "Wrote eviction hints: %d evictable (%d tokens), %d preserved",
@@ -94,9 +182,16 @@ class CompactionAdvisor:
         )
         return hints
 
-    def _build_guidance(self, report: EvictionReport, active_tasks) -> str:
+    def _build_guidance(
+        self,
+        report: EvictionReport,
+        task_lines: list,
+        evictable_lines: list,
+        preserved_lines: list,
+    ) -> str:
         """
         Human-readable compaction instruction injected into the summary prompt.
+        The per-item lines come from generate_hints.
         """
         lines = [
             "=== RAII Context Eviction Guidance ===",
@@ -105,36 +200,25 @@ class CompactionAdvisor:
             "",
         ]
 
-        if active_tasks:
+        if task_lines:
             lines.append("ACTIVE TASKS (must preserve context for these):")
-            for t in active_tasks:
-                lines.append(f"  • [{t.status.upper()}] {t.subject} (id={t.id})")
+            lines += task_lines
             lines.append("")
 
-        if report.evictable_chunks:
+        if evictable_lines:
             lines.append(
                 "SAFE TO OMIT from summary (all owning tasks complete, "
                 "no active references):"
             )
-            for c in report.evictable_chunks[:20]:  # cap for readability
-                refetch = " [re-fetchable]" if c.is_refetchable else ""
-                lines.append(
-                    f"  • {c.tool_name} result {c.id[:8]}…{refetch} "
-                    f"({c.size_tokens} tokens)"
-                )
-            if len(report.evictable_chunks) > 20:
-                lines.append(
-                    f"  … and {len(report.evictable_chunks) - 20} more (see eviction_hints.json)"
-                )
+            lines += evictable_lines
+            hidden = len(report.evictable_chunks) - len(evictable_lines)
+            if hidden > 0:
+                lines.append(f"  … and {hidden} more (see eviction_hints.json)")
             lines.append("")
 
-        if report.preserved_chunks:
+        if preserved_lines:
             lines.append("PRESERVE in summary (still needed):")
-            for c in report.preserved_chunks[:10]:
-                lines.append(
-                    f"  • {c.tool_name} result {c.id[:8]}… "
-                    f"({c.size_tokens} tokens) — {report.reasons.get(c.id, '?')}"
-                )
+            lines += preserved_lines
             lines.append("")
 
         lines += [
@@ -151,19 +235,26 @@ class CompactionAdvisor:
 
     def _write_hints(self, hints: dict) -> None:
         DB_DIR.mkdir(parents=True, exist_ok=True)
-        HINTS_PATH.write_text(json.dumps(hints, indent=2))
+        _write_json(HINTS_PATH, hints)
 
     def read_hints(self) -> Optional[dict]:
-        if not HINTS_PATH.exists():
+        """
+        The hints from the last generate_hints(), or None if it never ran.
+        The EMPTY_HINTS marker (that run had nothing to report) reads as
+        empty hints.
+        """
+        try:
+            hints = _read_json(HINTS_PATH)
+        except FileNotFoundError:
             return None
-        return json.loads(HINTS_PATH.read_text())
+        return _empty_hints() if hints == EMPTY_HINTS else hints
 
     def log_compaction_event(self, hints: dict, session_id: str) -> int:
         """
         Record a compaction event in the DB. Returns the new event ID.
         Called from SessionStart when source == "compact".
         """
-        with get_conn() as conn:
+        with get_conn(write=True) as conn:
             cursor = conn.execute(
                 """
                 INSERT INTO compaction_events
@@ -173,7 +264,7 @@ class CompactionAdvisor:
                 """,
                 (
                     session_id,
-                    _now(),
+                    utc_now(),
                     len(hints.get("safe_to_evict", [])),
                     len(hints.get("critical_to_preserve", [])),
                     hints.get("token_savings_estimate", 0),
@@ -186,8 +277,14 @@ class CompactionAdvisor:
         Write a compliance_monitor.json tracking which file paths were in each
         hint category. PostToolUse reads this to detect re-fetches after compaction.
         """
-        evictable_paths = _extract_read_paths(hints.get("safe_to_evict", []))
-        preserved_paths = _extract_read_paths(hints.get("critical_to_preserve", []))
+        if not (hints.get("safe_to_evict") or hints.get("critical_to_preserve")):
+            # No paths to watch; drop any monitor left from an earlier event
+            # so refetches aren't credited to it.
+            COMPLIANCE_MONITOR_PATH.unlink(missing_ok=True)
+            return
+        with get_conn():   # both lookups in one read transaction
+            evictable_paths = _extract_read_paths(hints.get("safe_to_evict", []))
+            preserved_paths = _extract_read_paths(hints.get("critical_to_preserve", []))
         monitor = {
             "compaction_event_id": event_id,
             "session_id": session_id,
@@ -197,7 +294,7 @@ class CompactionAdvisor:
             "preserved_file_paths": preserved_paths,
         }
         DB_DIR.mkdir(parents=True, exist_ok=True)
-        COMPLIANCE_MONITOR_PATH.write_text(json.dumps(monitor, indent=2))
+        _write_json(COMPLIANCE_MONITOR_PATH, monitor)
         log.info(
             "Wrote compliance monitor: %d evictable paths, %d preserved paths",
             len(evictable_paths),
@@ -213,27 +310,20 @@ class CompactionAdvisor:
         Re-fetch of evictable path  → confirmed_evicted++  (hint respected, chunk not in summary)
         Re-fetch of preserved path  → false_negatives++    (hint ignored, critical chunk dropped)
         """
-        if not COMPLIANCE_MONITOR_PATH.exists():
-            return
         try:
-            monitor = json.loads(COMPLIANCE_MONITOR_PATH.read_text())
+            event_id, evictable_paths, preserved_paths = _monitor_paths(COMPLIANCE_MONITOR_PATH)
         except Exception:
-            return
-
-        event_id = monitor.get("compaction_event_id")
+            return   # no monitor yet, or unreadable
         if not event_id:
             return
 
-        evictable_paths = set(monitor.get("evictable_file_paths", []))
-        preserved_paths = set(monitor.get("preserved_file_paths", []))
-
         in_evictable = file_path in evictable_paths
         in_preserved = file_path in preserved_paths
 
         if not in_evictable and not in_preserved:
             return
 
-        with get_conn() as conn:
+        with get_conn(write=True) as conn:
             if in_evictable:
                 conn.execute(
                     "UPDATE compaction_events SET confirmed_evicted = confirmed_evicted + 1 WHERE id = ?",
@@ -263,30 +353,24 @@ class CompactionAdvisor:
         if not COMPLIANCE_MONITOR_PATH.exists():
             return None
         try:
-            return json.loads(COMPLIANCE_MONITOR_PATH.read_text())
+            return _read_json(COMPLIANCE_MONITOR_PATH)
         except Exception:
             return None
 
 
 def _extract_read_paths(chunk_list: list) -> list:
-    """Extract file_path values from the tool_input of Read chunks in a hint list."""
-    from .storage import get_conn, deserialize
-    paths = []
+    """The file paths (target_path) of the Read chunks in a hint list."""
     chunk_ids = [c["chunk_id"] for c in chunk_list if c.get("chunk_id")]
     if not chunk_ids:
-        return paths
+        return []
     placeholders = ",".join("?" * len(chunk_ids))
     with get_conn() as conn:
         rows = conn.execute(
-            f"SELECT tool_input FROM context_chunks WHERE id IN ({placeholders}) AND tool_name = 'Read'",
+            f"""
+            SELECT target_path FROM context_chunks
+            WHERE id IN ({placeholders}) AND tool_name = 'Read'
+              AND target_path != ''
+            """,
             chunk_ids,
         ).fetchall()
-    for row in rows:
-        try:
-            ti = deserialize(row["tool_input"])
-            path = ti.get("file_path")
-            if path:
-                paths.append(path)
-        except Exception:
-            pass
-    return paths
+    return [r[0] for r in rows]
@@ -8,10 +8,10 @@ from __future__ import annotations
 import hashlib
 import json
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
-from typing import Optional, Set
+from functools import cached_property
+from typing import Iterable, Optional, Set
 
-from .storage import get_conn, serialize, deserialize
+from .storage import get_conn, serialize, deserialize, utc_now
 from .task_registry import TaskRegistry
 
 # Tools whose results can be re-fetched on demand — safe to mark refetchable
@@ -21,16 +21,45 @@ REFETCHABLE_TOOLS = frozenset({"Read", "Glob", "Grep", "WebFetch", "WebSearch"})
 _CHARS_PER_TOKEN = 4
 
 
-def _now() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
 def _estimate_tokens(text: str) -> int:
     return max(1, len(text) // _CHARS_PER_TOKEN)
 
 
-def _content_hash(content: str) -> str:
-    return hashlib.sha256(content.encode()).hexdigest()[:16]
+def _target_path(tool_input: dict) -> Optional[str]:
+    """The file or directory a tool call operates on, if it has one."""
+    return tool_input.get("file_path") or tool_input.get("path")
+
+
+# The columns _row_to_chunk unpacks, in order.
+_CHUNK_COLUMNS = (
+    "id, tool_name, tool_input, is_refetchable, status, "
+    "size_tokens, created_at, session_id, content_hash, sig_hash"
+)
+
+
+def _content_hash(content: str | bytes) -> str:
+    # A 64-bit fingerprint, not a MAC. SHA-256 stays: hashlib's OpenSSL build
+    # uses the CPU's SHA extensions where present, which beats BLAKE2 on large
+    # outputs, and the value must not depend on which extras are installed.
+    data = content if type(content) is bytes else content.encode()
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def sig_hash(tool_name: str, tool_input: dict) -> Optional[str]:
+    """
+    A 64-bit fingerprint of tool_name + canonical tool_input: two calls with
+    the same signature fetch the same thing, so the later one supersedes the
+    earlier. Stored with the chunk so eviction runs don't re-serialize it.
+    """
+    try:
+        canonical = json.dumps(
+            tool_input, sort_keys=True, separators=(",", ":"), default=str
+        )
+    except Exception:
+        return None
+    return hashlib.blake2b(
+        f"{tool_name}::{canonical}".encode(), digest_size=8
+    ).hexdigest()
 
 
 @dataclass
@@ -42,9 +71,15 @@ class ContextChunk:
     is_refetchable: bool = False
     status: str = "fresh"            # fresh | integrated | evictable
     size_tokens: int = 0
-    created_at: str = field(default_factory=_now)
+    created_at: str = field(default_factory=utc_now)
     session_id: Optional[str] = None
     content_hash: Optional[str] = None
+    sig_hash: Optional[str] = None
+
+    @cached_property
+    def short_id(self) -> str:
+        """The id as shown in guidance text; computed only for chunks that get shown."""
+        return self.id[:8]
 
 
 class ContextTagger:
@@ -82,30 +117,50 @@ class ContextTagger:
             size_tokens=_estimate_tokens(tool_output),
             session_id=session_id,
             content_hash=_content_hash(tool_output),
+            sig_hash=sig_hash(tool_name, tool_input),
         )
 
-        self._persist(chunk)
-
-        if active_task_id:
-            self._registry.tag_chunk(active_task_id, tool_use_id)
+        # The chunk row and its task tag commit together, in one transaction.
+        with get_conn(write=True):
+            self._persist(chunk)
+            if active_task_id:
+                self._registry.tag_chunk(active_task_id, tool_use_id)
 
         return chunk
 
     def get(self, chunk_id: str) -> Optional[ContextChunk]:
         with get_conn() as conn:
-            row = conn.execute(
-                "SELECT * FROM context_chunks WHERE id = ?", (chunk_id,)
+            row = _plain_rows(
+                conn, f"SELECT {_CHUNK_COLUMNS} FROM context_chunks WHERE id = ?", (chunk_id,)
             ).fetchone()
             if row is None:
                 return None
-            return self._row_to_chunk(conn, row)
+            task_rows = conn.execute(
+                "SELECT task_id FROM task_chunks WHERE chunk_id = ?", (chunk_id,)
+            ).fetchall()
+            return self._row_to_chunk(row, {r["task_id"] for r in task_rows})
 
     def mark_evictable(self, chunk_id: str) -> None:
-        with get_conn() as conn:
+        with get_conn(write=True) as conn:
             conn.execute(
                 "UPDATE context_chunks SET status = 'evictable', status_changed_at = ? WHERE id = ?",
-                (_now(), chunk_id),
+                (utc_now(), chunk_id),
+            )
+
+    def mark_evictable_many(self, chunk_ids: Iterable[str]) -> int:
+        """mark_evictable for several chunks in one UPDATE. Returns the count marked."""
+        ids = list(chunk_ids)
+        if not ids:
+            return 0
+        with get_conn(write=True) as conn:
+            cur = conn.execute(
+                """
+                UPDATE context_chunks SET status = 'evictable', status_changed_at = ?
+                WHERE id IN (SELECT value FROM json_each(?))
+                """,
+                (utc_now(), serialize(ids)),
             )
+            return cur.rowcount
 
     def invalidate_reads_for_path(self, file_path: str) -> int:
         """
@@ -113,24 +168,32 @@ class ContextTagger:
         Called when an Edit/Write modifies the file — prior reads are now stale.
         Returns the count of chunks invalidated.
         """
-        with get_conn() as conn:
-            rows = conn.execute(
-                "SELECT id, tool_input FROM context_chunks WHERE tool_name = 'Read' AND status = 'fresh'"
-            ).fetchall()
-            now = _now()
-            invalidated = 0
-            for row in rows:
-                tool_input = deserialize(row["tool_input"])
-                if tool_input.get("file_path") == file_path:
-                    conn.execute(
-                        "UPDATE context_chunks SET status = 'evictable', status_changed_at = ? WHERE id = ?",
-                        (now, row["id"]),
-                    )
-                    invalidated += 1
-            return invalidated
+        return self.invalidate_reads_for_paths((file_path,))
+
+    def invalidate_reads_for_paths(self, file_paths: Iterable[str]) -> int:
+        """
+        invalidate_reads_for_path for several files in one UPDATE, e.g. all
+        the files touched by a MultiEdit. Returns the total count invalidated.
+        """
+        paths = list(dict.fromkeys(file_paths))
+        if not paths:
+            return 0
+        qmarks = ",".join("?" * len(paths))
+        # The unary + keeps the planner on idx_chunks_target_path (a few rows
+        # per path) instead of idx_chunks_status_tool (every fresh Read).
+        with get_conn(write=True) as conn:
+            cur = conn.execute(
+                f"""
+                UPDATE context_chunks SET status = 'evictable', status_changed_at = ?
+                WHERE target_path IN ({qmarks})
+                  AND +tool_name = 'Read' AND +status = 'fresh'
+                """,
+                (utc_now(), *paths),
+            )
+            return cur.rowcount
 
     def mark_integrated(self, chunk_id: str) -> None:
-        with get_conn() as conn:
+        with get_conn(write=True) as conn:
             conn.execute(
                 "UPDATE context_chunks SET status = 'integrated' WHERE id = ?",
                 (chunk_id,),
@@ -138,17 +201,26 @@ class ContextTagger:
 
     def list_evictable(self) -> list[ContextChunk]:
         with get_conn() as conn:
-            rows = conn.execute(
-                "SELECT * FROM context_chunks WHERE status = 'evictable'"
+            rows = _plain_rows(
+                conn, f"SELECT {_CHUNK_COLUMNS} FROM context_chunks WHERE status = 'evictable'"
             ).fetchall()
-            return [self._row_to_chunk(conn, r) for r in rows]
+            task_ids = _task_ids_by_chunk(
+                conn,
+                """
+                SELECT tc.chunk_id, tc.task_id FROM task_chunks tc
+                JOIN context_chunks c ON c.id = tc.chunk_id
+                WHERE c.status = 'evictable'
+                """,
+            )
+            return [self._row_to_chunk(r, task_ids.get(r[0], set())) for r in rows]
 
     def list_all(self) -> list[ContextChunk]:
         with get_conn() as conn:
-            rows = conn.execute(
-                "SELECT * FROM context_chunks ORDER BY created_at"
+            rows = _plain_rows(
+                conn, f"SELECT {_CHUNK_COLUMNS} FROM context_chunks ORDER BY created_at"
             ).fetchall()
-            return [self._row_to_chunk(conn, r) for r in rows]
+            task_ids = _task_ids_by_chunk(conn, "SELECT chunk_id, task_id FROM task_chunks")
+            return [self._row_to_chunk(r, task_ids.get(r[0], set())) for r in rows]
 
     # ------------------------------------------------------------------
     # Internal helpers
@@ -159,13 +231,14 @@ class ContextTagger:
         return task.id if task else None
 
     def _persist(self, chunk: ContextChunk) -> None:
-        with get_conn() as conn:
+        with get_conn(write=True) as conn:
             conn.execute(
                 """
                 INSERT INTO context_chunks
                     (id, tool_name, tool_input, is_refetchable, status,
-                     size_tokens, created_at, session_id, content_hash)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                     size_tokens, created_at, session_id, content_hash, target_path,
+                     sig_hash)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
                 ON CONFLICT(id) DO UPDATE SET
                     status       = excluded.status,
                     size_tokens  = excluded.size_tokens,
@@ -181,22 +254,45 @@ class ContextTagger:
                     chunk.created_at,
                     chunk.session_id,
                     chunk.content_hash,
+                    _target_path(chunk.tool_input),
+                    chunk.sig_hash,
                 ),
             )
 
-    def _row_to_chunk(self, conn, row) -> ContextChunk:
-        task_rows = conn.execute(
-            "SELECT task_id FROM task_chunks WHERE chunk_id = ?", (row["id"],)
-        ).fetchall()
+    def _row_to_chunk(self, row: tuple, task_ids: Set[str]) -> ContextChunk:
+        (id_, tool_name, tool_input, is_refetchable, status,
+         size_tokens, created_at, session_id, content_hash, sig_hash_) = row
         return ContextChunk(
-            id=row["id"],
-            tool_name=row["tool_name"],
-            tool_input=deserialize(row["tool_input"]),
-            task_ids={r["task_id"] for r in task_rows},
-            is_refetchable=bool(row["is_refetchable"]),
-            status=row["status"],
-            size_tokens=row["size_tokens"],
-            created_at=row["created_at"],
-            session_id=row["session_id"],
-            content_hash=row["content_hash"],
+            id=id_,
+            tool_name=tool_name,
+            tool_input=deserialize(tool_input),
+            task_ids=task_ids,
+            is_refetchable=bool(is_refetchable),
+            status=status,
+            size_tokens=size_tokens,
+            created_at=created_at,
+            session_id=session_id,
+            content_hash=content_hash,
+            sig_hash=sig_hash_,
         )
+
+
+def _plain_rows(conn, sql: str, params: tuple = ()):
+    """
+    Execute sql on a cursor that yields plain tuples rather than sqlite3.Row,
+    for scans that unpack every row positionally anyway.
+    """
+    cur = conn.cursor()
+    cur.row_factory = None
+    return cur.execute(sql, params)
+
+
+def _task_ids_by_chunk(conn, sql: str) -> dict[str, Set[str]]:
+    """
+    Group (chunk_id, task_id) rows into {chunk_id: task_ids}, so a list of
+    chunks needs one task_chunks query rather than one per chunk.
+    """
+    by_chunk: dict[str, Set[str]] = {}
+    for chunk_id, task_id in conn.execute(sql):
+        by_chunk.setdefault(chunk_id, set()).add(task_id)
+    return by_chunk
@@ -12,12 +12,11 @@ Eviction rules:
 
 from __future__ import annotations
 
-import json
 import logging
 from dataclasses import dataclass, field
-from typing import List, Set, Dict, Optional
+from typing import List, Set, Dict, Optional, Tuple
 
-from .context_tagger import ContextChunk, ContextTagger
+from .context_tagger import ContextChunk, ContextTagger, sig_hash
 from .reference_graph import ReferenceGraph
 from .task_registry import TaskRegistry
 from .storage import get_conn
@@ -59,39 +58,67 @@ class EvictionEngine:
         If update_db=True, marks newly evictable chunks in the DB and
         auto-abandons stale in_progress tasks before evaluating evictions.
         """
-        if update_db:
-            abandoned = self._registry.abandon_stale_tasks(threshold=50)
-            for tid in abandoned:
-                log.info("Auto-abandoned stale task before eviction run: %s", tid)
-
-        report = EvictionReport()
-        chunks = self._tagger.list_all()
-        active_referenced = self._graph.chunks_referenced_by_active_tasks()
-
-        # Build a supersession index: (tool_name, input_hash) → latest chunk_id
-        supersession_index = self._build_supersession_index(chunks)
-
-        for chunk in chunks:
-            if chunk.status == "evictable":
-                # Already marked; include in report as evictable
-                report.evictable_chunks.append(chunk)
-                report.total_evictable_tokens += chunk.size_tokens
-                report.reasons[chunk.id] = "previously_marked_evictable"
-                continue
-
-            reason = self._why_keep(chunk, active_referenced, supersession_index)
-            if reason is None:
-                # Safe to evict
-                report.evictable_chunks.append(chunk)
-                report.total_evictable_tokens += chunk.size_tokens
-                report.reasons[chunk.id] = "all_tasks_complete_no_active_refs"
-                if update_db:
-                    self._tagger.mark_evictable(chunk.id)
-                    log.info("Marked evictable: %s (%d tokens)", chunk.id, chunk.size_tokens)
-            else:
-                report.preserved_chunks.append(chunk)
-                report.total_preserved_tokens += chunk.size_tokens
-                report.reasons[chunk.id] = reason
+        # One transaction for the whole run: the stale-task sweep, the reads
+        # and the status flips commit together instead of once per chunk.
+        with get_conn(write=update_db):
+            if update_db:
+                abandoned = self._registry.abandon_stale_tasks(threshold=50)
+                for tid in abandoned:
+                    log.info("Auto-abandoned stale task before eviction run: %s", tid)
+
+            chunks = self._tagger.list_all()
+            active_referenced = self._graph.chunks_referenced_by_active_tasks()
+            owners_complete, dependents_active = self._owner_state()
+
+            # Signatures are stored at ingest; only rows from before the
+            # sig_hash column need one computed, once, here.
+            sigs = {c.id: self._chunk_signature(c) for c in chunks}
+
+            # Build a supersession index: (tool_name, input_hash) → latest chunk_id
+            supersession_index = self._build_supersession_index(chunks, sigs)
+
+            # (chunk, reason kept), reason None = evictable. Chunks already
+            # marked evictable stay evictable without re-checking the rules.
+            decisions = [
+                (
+                    c,
+                    None if c.status == "evictable" else self._why_keep(
+                        c,
+                        sigs[c.id],
+                        active_referenced,
+                        owners_complete,
+                        dependents_active,
+                        supersession_index,
+                    ),
+                )
+                for c in chunks
+            ]
+            evictable = [c for c, reason in decisions if reason is None]
+            preserved = [c for c, reason in decisions if reason is not None]
+            report = EvictionReport(
+                evictable_chunks=evictable,
+                preserved_chunks=preserved,
+                total_evictable_tokens=sum(c.size_tokens for c in evictable),
+                total_preserved_tokens=sum(c.size_tokens for c in preserved),
+                reasons={
+                    c.id: reason if reason is not None
+                    else "previously_marked_evictable" if c.status == "evictable"
+                    else "all_tasks_complete_no_active_refs"
+                    for c, reason in decisions
+                },
+            )
+
+            newly_evictable = [c for c in evictable if c.status != "evictable"]
+            if update_db and newly_evictable:
+                self._tagger.mark_evictable_many(c.id for c in newly_evictable)
+                log.info(
+                    "Marked evictable: %d chunks / %d tokens",
+                    len(newly_evictable),
+                    sum(c.size_tokens for c in newly_evictable),
+                )
+                if log.isEnabledFor(logging.DEBUG):
+                    for c in newly_evictable:
+                        log.debug("Marked evictable: %s (%d tokens)", c.id, c.size_tokens)
 
         log.info("Eviction run complete. %s", report.summary())
         return report
@@ -99,18 +126,20 @@ class EvictionEngine:
     def _why_keep(
         self,
         chunk: ContextChunk,
+        sig: Optional[str],
         active_referenced: Set[str],
+        owners_complete: Set[str],
+        dependents_active: Set[str],
         supersession_index: Dict[str, str],
     ) -> Optional[str]:
         """
         Returns a string reason why the chunk must be kept, or None if it can be evicted.
         """
         # Rule 1: check if superseded by a newer identical call
-        sig = self._chunk_signature(chunk)
         if sig in supersession_index and supersession_index[sig] != chunk.id:
             # A newer chunk with same tool+input exists → this one is superseded.
             # But only evict if all tasks owning it are complete.
-            if self._all_owning_tasks_complete(chunk):
+            if chunk.id in owners_complete:
                 return None
             return "superseded_but_task_still_active"
 
@@ -119,53 +148,68 @@ class EvictionEngine:
             return "referenced_by_active_task"
 
         # Rule 3: owning tasks not all complete
-        if not self._all_owning_tasks_complete(chunk):
+        if chunk.id not in owners_complete:
             return "owning_task_not_complete"
 
         # Rule 4: an active task declared a dependency on one of the owning tasks,
         # meaning it semantically depends on this chunk's context.
-        if self._any_owning_task_has_active_dependents(chunk):
+        if chunk.id in dependents_active:
             return "active_dependent_task"
 
         # All rules pass → evictable
         return None
 
-    def _any_owning_task_has_active_dependents(self, chunk: ContextChunk) -> bool:
-        for task_id in chunk.task_ids:
-            if self._registry.has_active_dependents(task_id):
-                return True
-        return False
-
-    def _all_owning_tasks_complete(self, chunk: ContextChunk) -> bool:
-        if not chunk.task_ids:
-            # Untagged chunk — treat as orphan; safe to evict after a grace period
-            # For now, keep unless we have a clear signal.
-            return False
-        tasks = [self._registry.get(tid) for tid in chunk.task_ids]
-        return all(t is not None and t.is_complete() for t in tasks)
+    def _owner_state(self) -> Tuple[Set[str], Set[str]]:
+        """
+        Rules 3 and 4 for every tagged chunk not yet marked evictable (run()
+        doesn't re-check those), in one query over task_chunks:
+        (chunks whose owning tasks all exist and are completed/abandoned,
+         chunks with an owning task that an active task declared dependsOn).
+
+        An untagged chunk is in neither set. It is treated as an orphan and
+        kept for now; it could be evicted after a grace period, but there is
+        no clear signal for that yet.
+        """
+        with get_conn() as conn:
+            rows = conn.execute(
+                """
+                SELECT tc.chunk_id,
+                       MIN(COALESCE(t.status IN ('completed', 'abandoned'), 0)),
+                       MAX(EXISTS (
+                           SELECT 1 FROM task_dependencies td
+                           JOIN tasks d ON d.id = td.dependent_task_id
+                           WHERE td.dependency_task_id = tc.task_id
+                             AND d.status IN ('pending', 'in_progress')
+                       ))
+                FROM task_chunks tc
+                JOIN context_chunks c ON c.id = tc.chunk_id
+                LEFT JOIN tasks t ON t.id = tc.task_id
+                WHERE c.status != 'evictable'
+                GROUP BY tc.chunk_id
+                """
+            ).fetchall()
+        owners_complete = {r[0] for r in rows if r[1]}
+        dependents_active = {r[0] for r in rows if r[2]}
+        return owners_complete, dependents_active
 
     def _build_supersession_index(
-        self, chunks: List[ContextChunk]
+        self, chunks: List[ContextChunk], sigs: Dict[str, Optional[str]]
     ) -> Dict[str, str]:
         """
-        Map (tool_name, serialized_input) → chunk_id of the LATEST chunk with that signature.
+        Map signature (tool_name + input) → chunk_id of the LATEST chunk with that signature.
         Earlier chunks with the same signature are considered superseded.
         """
         index: Dict[str, str] = {}
         # chunks are ordered by created_at from list_all()
         for chunk in chunks:
-            sig = self._chunk_signature(chunk)
+            sig = sigs[chunk.id]
             if sig:
                 index[sig] = chunk.id  # later entries overwrite earlier
         return index
 
     def _chunk_signature(self, chunk: ContextChunk) -> Optional[str]:
-        """A stable key for deduplication: tool_name + canonicalized input."""
-        try:
-            canonical_input = json.dumps(chunk.tool_input, sort_keys=True)
-            return f"{chunk.tool_name}::{canonical_input}"
-        except Exception:
-            return None
+        """A stable key for deduplication: hash of tool_name + canonicalized input."""
+        return chunk.sig_hash or sig_hash(chunk.tool_name, chunk.tool_input)
 
     def evictable_token_count(self) -> int:
         """Quick query: total tokens in evictable chunks."""
@@ -0,0 +1,41 @@
+"""
+JSON encode/decode for hook I/O.
+
+Hook events carry whole tool outputs (file contents, command output), so
+parsing them is a measurable part of every hook call. orjson is used when it
+is installed (`pip install context-raii[fast]`); otherwise this falls back to
+the stdlib json module. Both paths take and return bytes and emit compact
+JSON, or 2-space indented JSON from dumps_indent() for files people read.
+
+Canonical forms that must be identical across environments (hashes,
+signatures) should keep using the stdlib json module directly.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=str, option=_OPTIONS)
+
+    def dumps_indent(obj) -> bytes:
+        return orjson.dumps(obj, default=str, option=_OPTIONS | orjson.OPT_INDENT_2)
+
+    loads = orjson.loads
+else:
+    _encoder = json.JSONEncoder(separators=(",", ":"), default=str)
+    _indent_encoder = json.JSONEncoder(indent=2, default=str)
+
+    def dumps(obj) -> bytes:
+        return _encoder.encode(obj).encode()
+
+    def dumps_indent(obj) -> bytes:
+        return _indent_encoder.encode(obj).encode()
+
+    loads = json.loads
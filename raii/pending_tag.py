@@ -0,0 +1,128 @@
+"""
+Hand-off of the active task id from pre_tool_use to post_tool_use.
+
+pre_tool_use knows which task is active when a tool is called; post_tool_use
+needs that to tag the result. The tag lives in a small memory-mapped file next
+to state.db, so each hook does a memcpy into a mapped page instead of writing,
+re-opening and parsing a JSON file.
+
+Layout (little-endian):
+    0   Q    sequence number, odd while a write is in progress
+    8   8s   blake2b-64 of tool_use_id (all zero = no tag)
+    16  H    len(tool_use_id)
+    18  H    len(active_task_id), or NO_TASK
+    20  ...  tool_use_id bytes, then active_task_id bytes
+
+Writes bump the sequence number before and after touching the tag, and a
+reader retries (then gives up) if it saw a write in progress or the number
+changed while it was copying, so it never returns a torn task id. A tag only
+matches when both the hash and the stored tool_use_id agree.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Optional
+
+from . import storage
+
+FILENAME = "pending_tag.bin"
+SIZE = 4096
+
+_SEQ = struct.Struct("<Q")
+_HEADER = struct.Struct("<Q8sHH")
+_TAG = struct.Struct("<8sHH")
+_EMPTY = bytes(_TAG.size)
+NO_TASK = 0xFFFF
+
+# A write takes microseconds; a reader that still sees one in progress after
+# this many attempts treats the tag as missing.
+_READ_ATTEMPTS = 8
+
+# Mapped files by path; a process maps each tag file once.
+_maps: dict[Path, mmap.mmap] = {}
+
+
+def self_tagged_task_id(tool_name: str, tool_input: dict) -> Optional[str]:
+    """
+    The task a lifecycle call is about, for calls that tag themselves:
+    TaskCreate and TaskUpdate(in_progress) fire before their task is active,
+    so post_tool_use takes the id from tool_input and pre_tool_use writes no
+    tag for them.
+    """
+    if tool_name == "TaskCreate":
+        return tool_input.get("id") or tool_input.get("task_id")
+    if tool_name == "TaskUpdate" and tool_input.get("status") == "in_progress":
+        return (
+            tool_input.get("taskId")
+            or tool_input.get("id")
+            or tool_input.get("task_id")
+        )
+    return None
+
+
+def _path() -> Path:
+    return storage.DB_DIR / FILENAME
+
+
+def _map() -> mmap.mmap:
+    path = _path()
+    mm = _maps.get(path)
+    if mm is None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < SIZE:
+                os.ftruncate(fd, SIZE)
+            mm = _maps[path] = mmap.mmap(fd, SIZE)
+        finally:
+            os.close(fd)
+    return mm
+
+
+def _hash(tool_use_id: bytes) -> bytes:
+    return hashlib.blake2b(tool_use_id, digest_size=8).digest()
+
+
+def write(tool_use_id: str, active_task_id: Optional[str]) -> None:
+    """Record the active task for tool_use_id, replacing any previous tag."""
+    mm = _map()
+    uid = tool_use_id.encode()
+    tid = active_task_id.encode() if active_task_id is not None else b""
+    end = _HEADER.size + len(uid) + len(tid)
+    seq = _SEQ.unpack_from(mm, 0)[0] | 1
+    _SEQ.pack_into(mm, 0, seq)
+    if end > SIZE or len(tid) >= NO_TASK:
+        mm[_SEQ.size:_HEADER.size] = _EMPTY   # doesn't fit: post_tool_use sees no tag
+    else:
+        mm[_HEADER.size:end] = uid + tid
+        _TAG.pack_into(
+            mm, _SEQ.size, _hash(uid), len(uid),
+            NO_TASK if active_task_id is None else len(tid),
+        )
+    _SEQ.pack_into(mm, 0, seq + 1)
+
+
+def read(tool_use_id: str) -> Optional[str]:
+    """The active task recorded for tool_use_id, or None if there is no such tag."""
+    mm = _map()
+    uid = tool_use_id.encode()
+    for _ in range(_READ_ATTEMPTS):
+        seq, digest, uid_len, tid_len = _HEADER.unpack_from(mm, 0)
+        if seq & 1:
+            os.sched_yield()
+            continue
+        if digest != _hash(uid) or uid_len != len(uid) or tid_len == NO_TASK:
+            tag = None
+        else:
+            start = _HEADER.size
+            body = mm[start:start + uid_len + tid_len]
+            tag = body[uid_len:] if body[:uid_len] == uid else None
+        if _SEQ.unpack_from(mm, 0)[0] == seq:
+            return tag.decode() if tag is not None else None
+        os.sched_yield()
+    return None
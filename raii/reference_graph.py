@@ -6,14 +6,9 @@ Tracks which tasks reference which chunks, supporting ref-counted eviction decis
 from __future__ import annotations
 
 from dataclasses import dataclass
-from datetime import datetime, timezone
 from typing import List, Set
 
-from .storage import get_conn
-
-
-def _now() -> str:
-    return datetime.now(timezone.utc).isoformat()
+from .storage import get_conn, utc_now
 
 
 REFERENCE_TYPES = frozenset(
@@ -30,7 +25,7 @@ class ReferenceEdge:
 
     def __post_init__(self):
         if not self.created_at:
-            self.created_at = _now()
+            self.created_at = utc_now()
 
 
 class ReferenceGraph:
@@ -50,18 +45,18 @@ class ReferenceGraph:
     ) -> None:
         if reference_type not in REFERENCE_TYPES:
             raise ValueError(f"Unknown reference type: {reference_type!r}")
-        with get_conn() as conn:
+        with get_conn(write=True) as conn:
             conn.execute(
                 """
                 INSERT OR IGNORE INTO reference_edges
                     (source_task_id, target_chunk_id, reference_type, created_at)
                 VALUES (?, ?, ?, ?)
                 """,
-                (task_id, chunk_id, reference_type, _now()),
+                (task_id, chunk_id, reference_type, utc_now()),
             )
 
     def remove_edge(self, task_id: str, chunk_id: str, reference_type: str) -> None:
-        with get_conn() as conn:
+        with get_conn(write=True) as conn:
             conn.execute(
                 """
                 DELETE FROM reference_edges
@@ -106,16 +101,19 @@ class ReferenceGraph:
 
     def all_edges(self) -> List[ReferenceEdge]:
         with get_conn() as conn:
-            rows = conn.execute("SELECT * FROM reference_edges").fetchall()
-            return [
-                ReferenceEdge(
-                    source_task_id=r["source_task_id"],
-                    target_chunk_id=r["target_chunk_id"],
-                    reference_type=r["reference_type"],
-                    created_at=r["created_at"],
-                )
-                for r in rows
-            ]
+            rows = conn.execute(
+                "SELECT source_task_id, target_chunk_id, reference_type, created_at "
+                "FROM reference_edges"
+            ).fetchall()
+        return [
+            ReferenceEdge(
+                source_task_id=r["source_task_id"],
+                target_chunk_id=r["target_chunk_id"],
+                reference_type=r["reference_type"],
+                created_at=r["created_at"],
+            )
+            for r in rows
+        ]
 
     def edge_count(self) -> int:
         with get_conn() as conn:
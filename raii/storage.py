@@ -3,13 +3,17 @@ SQLite persistence layer for context-raii.
 DB lives at ~/.claude/raii/state.db and survives across hook invocations and sessions.
 """
 
+import hashlib
 import os
 import sqlite3
-import json
+import threading
+import time
 from pathlib import Path
 from contextlib import contextmanager
 from typing import Iterator
 
+from . import jsonio
+
 # Allow test harnesses to redirect the DB via env var
 _db_dir_override = os.environ.get("RAII_DB_DIR")
 DB_DIR = Path(_db_dir_override) if _db_dir_override else Path.home() / ".claude" / "raii"
@@ -80,60 +84,191 @@ CREATE TABLE IF NOT EXISTS compaction_events (
 );
 
 CREATE INDEX IF NOT EXISTS idx_compaction_session ON compaction_events(session_id);
-CREATE INDEX IF NOT EXISTS idx_tasks_status ON tasks(status);
-CREATE INDEX IF NOT EXISTS idx_chunks_status ON context_chunks(status);
-CREATE INDEX IF NOT EXISTS idx_edges_task ON reference_edges(source_task_id);
+CREATE INDEX IF NOT EXISTS idx_tasks_status_created ON tasks(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_chunks_status_tool ON context_chunks(status, tool_name, size_tokens);
+CREATE INDEX IF NOT EXISTS idx_chunks_tool_created ON context_chunks(tool_name, created_at);
 CREATE INDEX IF NOT EXISTS idx_edges_chunk ON reference_edges(target_chunk_id);
-CREATE INDEX IF NOT EXISTS idx_task_chunks_task ON task_chunks(task_id);
-CREATE INDEX IF NOT EXISTS idx_task_chunks_chunk ON task_chunks(chunk_id);
+CREATE INDEX IF NOT EXISTS idx_task_chunks_chunk_task ON task_chunks(chunk_id, task_id);
 CREATE INDEX IF NOT EXISTS idx_deps_dependent ON task_dependencies(dependent_task_id);
 CREATE INDEX IF NOT EXISTS idx_deps_dependency ON task_dependencies(dependency_task_id);
 """
 
 # Migrations for columns added after initial schema creation.
-# SQLite has no ALTER TABLE ... ADD COLUMN IF NOT EXISTS, so we try/except.
+# SQLite has no ALTER TABLE ... ADD COLUMN IF NOT EXISTS, so we try/except
+# on "duplicate column name".
+# A tuple is (ddl, *followups): the follow-up statements (indexes, backfills)
+# run only when the ddl itself succeeded, i.e. once per DB.
 _MIGRATIONS = [
     "ALTER TABLE context_chunks ADD COLUMN status_changed_at TEXT",
     "ALTER TABLE tasks ADD COLUMN abandoned_at TEXT",
+    # Superseded by idx_chunks_status_tool, which has status as its prefix.
+    "DROP INDEX IF EXISTS idx_chunks_status",
+    (
+        "ALTER TABLE context_chunks ADD COLUMN target_path TEXT",
+        "CREATE INDEX IF NOT EXISTS idx_chunks_target_path "
+        "ON context_chunks(target_path, created_at)",
+        "UPDATE context_chunks SET target_path = COALESCE("
+        "json_extract(tool_input, '$.file_path'), json_extract(tool_input, '$.path')) "
+        "WHERE json_valid(tool_input)",
+    ),
+    # Superseded by idx_task_chunks_chunk_task, which also covers task_id.
+    "DROP INDEX IF EXISTS idx_task_chunks_chunk",
+    # Rows from before this column keep NULL; the eviction engine computes
+    # their signature when it needs it.
+    "ALTER TABLE context_chunks ADD COLUMN sig_hash TEXT",
+    # Superseded by idx_tasks_status_created, which also serves ORDER BY created_at.
+    "DROP INDEX IF EXISTS idx_tasks_status",
+    # Redundant with reference_edges' UNIQUE index, which leads with source_task_id.
+    "DROP INDEX IF EXISTS idx_edges_task",
+    # Redundant with task_chunks' primary key, (task_id, chunk_id).
+    "DROP INDEX IF EXISTS idx_task_chunks_task",
 ]
 
 
+# Identifies the schema + migrations. ensure_db() leaves a `.ready-<tag>`
+# sentinel next to the DB once it has applied them, so later calls (every hook
+# invocation) cost two stat()s instead of a schema pass. Changing SCHEMA or
+# _MIGRATIONS changes the tag, which re-runs initialization once.
+_SCHEMA_TAG = hashlib.blake2b(
+    (SCHEMA + repr(_MIGRATIONS)).encode(), digest_size=6
+).hexdigest()
+
+
+# DB paths this process has already seen initialized; later ensure_db()
+# calls for them return without touching the filesystem. Keyed by path, not
+# a flag, so code that re-points DB_PATH (tests, the harness) still gets its
+# new DB initialized.
+_ready_paths: set[Path] = set()
+
+
 def ensure_db() -> None:
     """Create the DB directory and initialize schema if needed."""
+    if DB_PATH in _ready_paths:
+        return
+    ready = DB_DIR / f".ready-{_SCHEMA_TAG}"
+    if ready.exists() and DB_PATH.exists():
+        _ready_paths.add(DB_PATH)
+        return
     DB_DIR.mkdir(parents=True, exist_ok=True)
-    with sqlite3.connect(DB_PATH) as conn:
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        # WAL is a property of the database file: set once here, it holds
+        # for every later connection.
+        conn.execute("PRAGMA journal_mode=WAL")
         conn.executescript(SCHEMA)
         for migration in _MIGRATIONS:
+            ddl, *followups = (migration,) if isinstance(migration, str) else migration
             try:
-                conn.execute(migration)
-            except sqlite3.OperationalError:
-                pass  # column already exists
+                conn.execute(ddl)
+            except sqlite3.OperationalError as e:
+                # Only "already applied" is expected. Anything else (e.g.
+                # "database is locked") propagates, so the ready sentinel
+                # isn't written and the next call retries.
+                if "duplicate column name" not in str(e):
+                    raise
+                continue
+            for sql in followups:
+                conn.execute(sql)
         conn.commit()
+    finally:
+        conn.close()
+    for stale in DB_DIR.glob(".ready-*"):
+        if stale != ready:
+            stale.unlink(missing_ok=True)
+    ready.touch()
+    _ready_paths.add(DB_PATH)
 
 
-@contextmanager
-def get_conn() -> Iterator[sqlite3.Connection]:
-    """Context manager yielding a SQLite connection with row_factory set."""
-    ensure_db()
-    conn = sqlite3.connect(DB_PATH)
+# One connection per DB path, reused for the life of the process. The hook
+# worker, the in-process harness and multi-step hooks open many get_conn()
+# blocks; reconnecting for each one re-ran the PRAGMAs and threw away
+# SQLite's page cache. The connection may be used from any thread; _lock
+# keeps each transaction on it to one thread at a time.
+_connections: dict[Path, sqlite3.Connection] = {}
+_depth: dict[Path, int] = {}
+_lock = threading.RLock()
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA journal_mode=WAL")
+    # Per-connection settings; journal_mode=WAL persists in the file (ensure_db).
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-65536")
+    conn.execute("PRAGMA mmap_size=268435456")
     conn.execute("PRAGMA foreign_keys=ON")
-    try:
-        yield conn
-        conn.commit()
-    except Exception:
-        conn.rollback()
-        raise
-    finally:
-        conn.close()
+    return conn
+
+
+@contextmanager
+def get_conn(write: bool = False) -> Iterator[sqlite3.Connection]:
+    """
+    Context manager yielding the process's SQLite connection for DB_PATH.
+
+    The outermost block is one transaction: it commits on exit and rolls back
+    on error. Nested blocks join the enclosing transaction, so wrapping several
+    calls in `with get_conn():` batches them into a single commit.
+
+    Pass write=True for a block that writes. Its transaction starts with
+    BEGIN IMMEDIATE, so hooks fired in parallel wait for the write lock up
+    front (busy timeout) instead of failing with SQLITE_BUSY when a read
+    transaction tries to become a write. Reads use a deferred BEGIN and don't
+    take the write lock at all. The outermost block decides: an outer block
+    that contains writes must itself pass write=True.
+    """
+    with _lock:
+        path = DB_PATH
+        conn = _connections.get(path)
+        if conn is None:
+            ensure_db()
+            conn = _connections[path] = _connect(path)
+
+        depth = _depth.get(path, 0)
+        _depth[path] = depth + 1
+        if depth:
+            try:
+                yield conn
+            finally:
+                _depth[path] = depth
+            return
+
+        conn.execute("BEGIN IMMEDIATE" if write else "BEGIN")
+        try:
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+        finally:
+            _depth[path] = 0
+
+
+_second: tuple = (None, "")   # (unix second, its formatted prefix)
+
+
+def utc_now() -> str:
+    """
+    Current UTC time as ISO 8601 with microseconds, e.g.
+    2025-01-01T12:00:00.000123+00:00 — datetime.now(timezone.utc).isoformat(),
+    minus the datetime object. The seconds part is formatted once per second.
+    Unlike isoformat(), the microseconds are always present, so the strings
+    sort in time order.
+    """
+    global _second
+    sec, usec = divmod(time.time_ns() // 1000, 1_000_000)
+    if _second[0] != sec:
+        _second = (sec, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(sec)))
+    return f"{_second[1]}.{usec:06d}+00:00"
 
 
 def serialize(obj) -> str:
-    return json.dumps(obj, default=str)
+    """Compact JSON for a TEXT column (orjson when installed, see jsonio)."""
+    return jsonio.dumps(obj).decode()
 
 
 def deserialize(s: str):
     if s is None:
         return {}
-    return json.loads(s)
+    return jsonio.loads(s)
@@ -8,26 +8,21 @@ from __future__ import annotations
 import json
 import logging
 from dataclasses import dataclass, field
-from datetime import datetime, timezone
-from typing import Optional, Set, List, Dict
+from typing import Iterable, Optional, Set, List, Dict, Tuple
 
-from .storage import get_conn, serialize, deserialize
+from .storage import get_conn, serialize, deserialize, utc_now
 
 log = logging.getLogger(__name__)
 
 
-def _now() -> str:
-    return datetime.now(timezone.utc).isoformat()
-
-
 @dataclass
 class Task:
     id: str
     subject: str
     status: str                          # pending | in_progress | completed | abandoned
     parent_id: Optional[str] = None
-    context_chunk_ids: Set[str] = field(default_factory=set)
-    created_at: str = field(default_factory=_now)
+    context_chunk_ids: Tuple[str, ...] = ()    # sorted
+    created_at: str = field(default_factory=utc_now)
     completed_at: Optional[str] = None
     abandoned_at: Optional[str] = None
     metadata: Dict = field(default_factory=dict)
@@ -51,7 +46,7 @@ class TaskRegistry:
 
     def upsert(self, task: Task) -> None:
         """Insert or replace a task record."""
-        with get_conn() as conn:
+        with get_conn(write=True) as conn:
             conn.execute(
                 """
                 INSERT INTO tasks (id, subject, status, parent_id, created_at, completed_at, abandoned_at, metadata)
@@ -82,30 +77,33 @@ class TaskRegistry:
         return task
 
     def update_status(self, task_id: str, status: str) -> Optional[Task]:
-        task = self.get(task_id)
-        if task is None:
-            return None
-        task.status = status
-        if status == "completed" and task.completed_at is None:
-            task.completed_at = _now()
-        self.upsert(task)
+        # Read and write in one write transaction, so a parallel hook can't
+        # update the task in between.
+        with get_conn(write=True):
+            task = self.get(task_id)
+            if task is None:
+                return None
+            task.status = status
+            if status == "completed" and task.completed_at is None:
+                task.completed_at = utc_now()
+            self.upsert(task)
         return task
 
     def tag_chunk(self, task_id: str, chunk_id: str) -> None:
         """Associate a context chunk with a task."""
-        with get_conn() as conn:
+        with get_conn(write=True) as conn:
             conn.execute(
                 """
                 INSERT OR IGNORE INTO task_chunks (task_id, chunk_id, tagged_at)
                 VALUES (?, ?, ?)
                 """,
-                (task_id, chunk_id, _now()),
+                (task_id, chunk_id, utc_now()),
             )
 
     def add_dependency(self, dependent_task_id: str, dependency_task_id: str) -> None:
         """Record that dependent_task builds on dependency_task.
         Chunks owned by dependency_task stay pinned until dependent_task completes."""
-        with get_conn() as conn:
+        with get_conn(write=True) as conn:
             conn.execute(
                 """
                 INSERT OR IGNORE INTO task_dependencies (dependent_task_id, dependency_task_id)
@@ -128,9 +126,9 @@ class TaskRegistry:
 
         Returns list of task IDs that were abandoned.
         """
-        now = _now()
+        now = utc_now()
         abandoned = []
-        with get_conn() as conn:
+        with get_conn(write=True) as conn:
             in_progress = conn.execute(
                 "SELECT id, created_at FROM tasks WHERE status = 'in_progress'"
             ).fetchall()
@@ -177,19 +175,46 @@ class TaskRegistry:
             ).fetchone()
             if row is None:
                 return None
-            return self._row_to_task(conn, row)
+            return self._row_to_task(row, self._chunk_ids(conn, task_id))
 
     def list_active(self) -> List[Task]:
         with get_conn() as conn:
             rows = conn.execute(
                 "SELECT * FROM tasks WHERE status IN ('pending', 'in_progress')"
             ).fetchall()
-            return [self._row_to_task(conn, r) for r in rows]
+            return self._rows_to_tasks(conn, rows)
 
     def list_all(self) -> List[Task]:
         with get_conn() as conn:
             rows = conn.execute("SELECT * FROM tasks ORDER BY created_at").fetchall()
-            return [self._row_to_task(conn, r) for r in rows]
+            return self._rows_to_tasks(conn, rows)
+
+    def session_summary(self, recent: int = 5) -> Tuple[List[Task], int, List[Task]]:
+        """
+        What the post-compaction summary shows, in one query:
+        (active tasks, number of completed tasks, the `recent` most recently
+        completed tasks, newest first).
+        """
+        with get_conn() as conn:
+            rows = conn.execute(
+                """
+                SELECT *, 0 AS done, 0 AS done_count FROM tasks
+                WHERE status IN ('pending', 'in_progress')
+                UNION ALL
+                SELECT * FROM (
+                    SELECT *, 1, COUNT(*) OVER () FROM tasks
+                    WHERE status IN ('completed', 'abandoned')
+                    ORDER BY completed_at DESC, created_at
+                    LIMIT ?
+                )
+                """,
+                (recent,),
+            ).fetchall()
+            tasks = self._rows_to_tasks(conn, rows)
+            active = [t for t, r in zip(tasks, rows) if not r["done"]]
+            completed = [t for t, r in zip(tasks, rows) if r["done"]]
+            completed_count = rows[-1]["done_count"] if completed else 0
+            return active, completed_count, completed
 
     def get_current_active(self) -> Optional[Task]:
         """Return the most recently updated in-progress task, if any."""
@@ -199,14 +224,11 @@ class TaskRegistry:
             ).fetchone()
             if row is None:
                 return None
-            return self._row_to_task(conn, row)
+            return self._row_to_task(row, self._chunk_ids(conn, row["id"]))
 
     def chunks_for_task(self, task_id: str) -> Set[str]:
         with get_conn() as conn:
-            rows = conn.execute(
-                "SELECT chunk_id FROM task_chunks WHERE task_id = ?", (task_id,)
-            ).fetchall()
-            return {r["chunk_id"] for r in rows}
+            return self._chunk_ids(conn, task_id)
 
     def tasks_for_chunk(self, chunk_id: str) -> List[Task]:
         with get_conn() as conn:
@@ -218,22 +240,43 @@ class TaskRegistry:
                 """,
                 (chunk_id,),
             ).fetchall()
-            return [self._row_to_task(conn, r) for r in rows]
+            return self._rows_to_tasks(conn, rows)
 
     # ------------------------------------------------------------------
     # Internal helpers
     # ------------------------------------------------------------------
 
-    def _row_to_task(self, conn, row) -> Task:
-        chunk_rows = conn.execute(
-            "SELECT chunk_id FROM task_chunks WHERE task_id = ?", (row["id"],)
+    def _chunk_ids(self, conn, task_id: str) -> Set[str]:
+        rows = conn.execute(
+            "SELECT chunk_id FROM task_chunks WHERE task_id = ?", (task_id,)
         ).fetchall()
+        return {r["chunk_id"] for r in rows}
+
+    def _rows_to_tasks(self, conn, rows) -> List[Task]:
+        """
+        Build Tasks for a list of task rows, fetching all their chunk ids in
+        one task_chunks query rather than one per task.
+        """
+        if not rows:
+            return []
+        by_task: Dict[str, List[str]] = {}
+        for task_id, chunk_id in conn.execute(
+            """
+            SELECT task_id, chunk_id FROM task_chunks
+            WHERE task_id IN (SELECT value FROM json_each(?))
+            """,
+            (serialize([r["id"] for r in rows]),),
+        ):
+            by_task.setdefault(task_id, []).append(chunk_id)
+        return [self._row_to_task(r, by_task.get(r["id"], ())) for r in rows]
+
+    def _row_to_task(self, row, chunk_ids: Iterable[str]) -> Task:
         return Task(
             id=row["id"],
             subject=row["subject"],
             status=row["status"],
             parent_id=row["parent_id"],
-            context_chunk_ids={r["chunk_id"] for r in chunk_rows},
+            context_chunk_ids=tuple(sorted(chunk_ids)),
             created_at=row["created_at"],
             completed_at=row["completed_at"],
             abandoned_at=row["abandoned_at"] if "abandoned_at" in row.keys() else None,
@@ -0,0 +1,43 @@
+"""Shared fixtures: a per-test SQLite DB cloned from a schema built once."""
+
+import sqlite3
+from contextlib import closing
+
+import pytest
+
+from raii import storage
+
+
+@pytest.fixture(scope="session")
+def db_template(tmp_path_factory):
+    """A DB with the schema and migrations applied, built once per session."""
+    db_dir = tmp_path_factory.mktemp("template")
+    db_path = db_dir / "state.db"
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(storage, "DB_PATH", db_path)
+        mp.setattr(storage, "DB_DIR", db_dir)
+        storage.ensure_db()
+    return db_path
+
+
+@pytest.fixture
+def isolated_db(tmp_path, db_template, monkeypatch):
+    """
+    A fresh in-memory DB for each test, restored from db_template with
+    SQLite's backup API. get_conn() finds its connection already cached under
+    DB_PATH and ensure_db() finds the path marked ready, so no DB file, WAL or
+    shm is ever written; tmp_path only hosts DB_DIR's other files.
+    """
+    db_path = tmp_path / "state.db"
+    conn = storage._connect(":memory:")
+    with closing(sqlite3.connect(db_template)) as template:
+        template.backup(conn)
+    storage._connections[db_path] = conn
+    storage._ready_paths.add(db_path)
+    monkeypatch.setattr(storage, "DB_PATH", db_path)
+    monkeypatch.setattr(storage, "DB_DIR", tmp_path)
+    yield db_path
+    storage._ready_paths.discard(db_path)
+    conn = storage._connections.pop(db_path, None)
+    if conn is not None:
+        conn.close()
@@ -0,0 +1,118 @@
+"""Tests for CompactionAdvisor's hint files and compliance tracking."""
+
+import json
+
+import pytest
+
+from benchmarks import measure_session
+from raii import compaction_advisor
+from raii.compaction_advisor import CompactionAdvisor
+from raii.storage import get_conn
+
+
+@pytest.fixture(autouse=True)
+def hint_paths(isolated_db, tmp_path, monkeypatch):
+    """Point the hint and compliance monitor files into tmp_path."""
+    monkeypatch.setattr(compaction_advisor, "HINTS_PATH", tmp_path / "eviction_hints.json")
+    monkeypatch.setattr(
+        compaction_advisor, "COMPLIANCE_MONITOR_PATH", tmp_path / "compliance_monitor.json"
+    )
+
+
+def _event(advisor, evictable: int = 2) -> int:
+    hints = {
+        "safe_to_evict": [{"chunk_id": f"c{i}"} for i in range(evictable)],
+        "critical_to_preserve": [],
+        "token_savings_estimate": 100,
+    }
+    return advisor.log_compaction_event(hints, "s1")
+
+
+def _monitor(event_id: int, evictable: list, preserved: list):
+    compaction_advisor._write_json(compaction_advisor.COMPLIANCE_MONITOR_PATH, {
+        "compaction_event_id": event_id,
+        "evictable_file_paths": evictable,
+        "preserved_file_paths": preserved,
+    })
+
+
+def _events() -> list:
+    with get_conn() as conn:
+        return [tuple(r) for r in conn.execute("SELECT * FROM compaction_events ORDER BY id")]
+
+
+def _counts(event_id: int):
+    with get_conn() as conn:
+        row = conn.execute(
+            "SELECT confirmed_evicted, false_negatives FROM compaction_events WHERE id = ?",
+            (event_id,),
+        ).fetchone()
+    return row["confirmed_evicted"], row["false_negatives"]
+
+
+def _advisor():
+    return CompactionAdvisor(engine=object(), registry=object())
+
+
+class TestRecordRefetch:
+    def test_no_monitor_is_a_no_op(self):
+        advisor = _advisor()
+        _event(advisor)
+        before = _events()
+
+        advisor.record_refetch("/src/a.py")
+
+        assert _events() == before
+
+    def test_counts_evictable_and_preserved_refetches(self):
+        advisor = _advisor()
+        event_id = _event(advisor)
+        _monitor(event_id, ["/src/a.py"], ["/src/b.py"])
+
+        advisor.record_refetch("/src/a.py")
+        advisor.record_refetch("/src/a.py")
+        advisor.record_refetch("/src/b.py")
+        advisor.record_refetch("/src/other.py")
+
+        assert _counts(event_id) == (2, 1)
+
+    def test_rewritten_monitor_is_picked_up(self):
+        advisor = _advisor()
+        first = _event(advisor)
+        _monitor(first, ["/src/a.py"], [])
+        advisor.record_refetch("/src/a.py")
+
+        second = _event(advisor)
+        _monitor(second, ["/src/b.py"], [])
+        advisor.record_refetch("/src/a.py")
+        advisor.record_refetch("/src/b.py")
+
+        assert _counts(first) == (1, 0)
+        assert _counts(second) == (1, 0)
+
+
+class TestEmptyHints:
+    def test_empty_report_writes_empty_marker(self, tmp_path):
+        stale = tmp_path / "eviction_hints.json"
+        stale.write_text('{"safe_to_evict": [{"chunk_id": "old"}]}')
+
+        advisor = CompactionAdvisor()
+        hints = advisor.generate_hints()
+
+        assert hints["safe_to_evict"] == []
+        assert json.loads(stale.read_text()) == compaction_advisor.EMPTY_HINTS
+        assert advisor.read_hints()["safe_to_evict"] == []
+
+    def test_dashboard_reads_the_empty_marker(self, tmp_path, capsys):
+        CompactionAdvisor().generate_hints()
+        measure_session.print_hints(tmp_path / "eviction_hints.json")
+        assert "nothing to report" in capsys.readouterr().out
+
+    def test_no_hints_file_reads_as_none(self):
+        assert _advisor().read_hints() is None
+
+    def test_empty_hints_clear_the_compliance_monitor(self, tmp_path):
+        advisor = _advisor()
+        _monitor(_event(advisor), ["/src/a.py"], [])
+        advisor.write_compliance_monitor(_event(advisor), "s1", compaction_advisor._empty_hints())
+        assert not (tmp_path / "compliance_monitor.json").exists()
@@ -9,31 +9,25 @@ Key invariants:
 - update_db=True marks chunks as 'evictable' in SQLite.
 """
 
+import json
+
 import pytest
-from unittest.mock import patch
-from datetime import datetime, timezone
+
+from raii.context_tagger import REFETCHABLE_TOOLS, ContextTagger
+from raii.eviction_engine import EvictionEngine
+from raii.reference_graph import ReferenceGraph
+from raii.storage import get_conn, utc_now
+from raii.task_registry import TaskRegistry
 
 
-@pytest.fixture(autouse=True)
-def isolated_db(tmp_path):
-    db_path = tmp_path / "state.db"
-    with (
-        patch("raii.storage.DB_PATH", db_path),
-        patch("raii.storage.DB_DIR", tmp_path),
-    ):
-        yield db_path
+pytestmark = pytest.mark.usefixtures("isolated_db")
 
 
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _ts():
-    return datetime.now(timezone.utc).isoformat()
-
-
 def _task(task_id: str, status: str = "in_progress"):
-    from raii.task_registry import TaskRegistry
     reg = TaskRegistry()
     reg.create(id=task_id, subject=f"Task {task_id}")
     if status != "pending":
@@ -41,6 +35,50 @@ def _task(task_id: str, status: str = "in_progress"):
     return reg
 
 
+def _chunk_row(
+    chunk_id: str,
+    tool_name: str = "Read",
+    size: int = 100,
+    tool_input: dict = None,
+) -> tuple:
+    """A context_chunks row for _seed."""
+    tool_input = tool_input or {}
+    return (
+        chunk_id,
+        tool_name,
+        json.dumps(tool_input) if tool_input else "{}",
+        int(tool_name in REFETCHABLE_TOOLS),
+        "fresh",
+        size,
+        utc_now(),
+        tool_input.get("file_path") or tool_input.get("path"),
+    )
+
+
+def _seed(tasks=(), chunks=(), task_chunks=()):
+    """
+    Insert tasks as (id, status), chunks as _chunk_row() tuples and tags as
+    (task_id, chunk_id), all in one transaction.
+    """
+    ts = utc_now()
+    with get_conn(write=True) as conn:
+        conn.executemany(
+            "INSERT INTO tasks (id, subject, status, created_at) VALUES (?, ?, ?, ?)",
+            [(tid, f"Task {tid}", status, ts) for tid, status in tasks],
+        )
+        conn.executemany(
+            "INSERT INTO context_chunks "
+            "(id, tool_name, tool_input, is_refetchable, status, size_tokens, created_at, "
+            "target_path) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            chunks,
+        )
+        conn.executemany(
+            "INSERT INTO task_chunks (task_id, chunk_id, tagged_at) VALUES (?, ?, ?)",
+            [(tid, cid, ts) for tid, cid in task_chunks],
+        )
+
+
 def _chunk(
     chunk_id: str,
     tool_name: str = "Read",
@@ -49,36 +87,19 @@ def _chunk(
     tool_input: dict = None,
 ):
     """Insert a chunk and optionally associate it with a task."""
-    from raii.storage import get_conn, ensure_db
-    ensure_db()
-    import json
-    with get_conn() as conn:
-        conn.execute(
-            "INSERT OR IGNORE INTO context_chunks "
-            "(id, tool_name, tool_input, is_refetchable, status, size_tokens, created_at) "
-            "VALUES (?, ?, ?, ?, ?, ?, ?)",
-            (
-                chunk_id,
-                tool_name,
-                json.dumps(tool_input or {}),
-                1 if tool_name in ("Read", "Grep", "Glob") else 0,
-                "fresh",
-                size,
-                _ts(),
-            ),
-        )
-        if task_id:
-            conn.execute(
-                "INSERT OR IGNORE INTO task_chunks (task_id, chunk_id, tagged_at) VALUES (?, ?, ?)",
-                (task_id, chunk_id, _ts()),
-            )
+    _seed(
+        chunks=[_chunk_row(chunk_id, tool_name, size, tool_input)],
+        task_chunks=[(task_id, chunk_id)] if task_id else (),
+    )
+
+
+def _evictable(registry=None, graph=None) -> set:
+    """Ids of the chunks a dry run (update_db=False) reports as evictable."""
+    report = _engine(registry=registry, graph=graph).run(update_db=False)
+    return {c.id for c in report.evictable_chunks}
 
 
 def _engine(registry=None, tagger=None, graph=None):
-    from raii.eviction_engine import EvictionEngine
-    from raii.task_registry import TaskRegistry
-    from raii.context_tagger import ContextTagger
-    from raii.reference_graph import ReferenceGraph
     reg = registry or TaskRegistry()
     tag = tagger or ContextTagger(reg)
     gr = graph or ReferenceGraph()
@@ -90,73 +111,54 @@ def _engine(registry=None, tagger=None, graph=None):
 # ---------------------------------------------------------------------------
 
 class TestBasicEviction:
-    def test_chunk_evictable_when_task_complete(self):
-        reg = _task("t1", "completed")
-        _chunk("c1", task_id="t1")
-        report = _engine(registry=reg).run(update_db=False)
-        evictable_ids = {c.id for c in report.evictable_chunks}
-        assert "c1" in evictable_ids
-
-    def test_chunk_not_evictable_when_task_in_progress(self):
-        reg = _task("t1", "in_progress")
-        _chunk("c1", task_id="t1")
-        report = _engine(registry=reg).run(update_db=False)
-        evictable_ids = {c.id for c in report.evictable_chunks}
-        assert "c1" not in evictable_ids
-
-    def test_untagged_chunk_not_evictable(self):
-        """Chunks with no task association should be kept (unknown ownership)."""
-        _chunk("c_orphan")
-        report = _engine().run(update_db=False)
-        evictable_ids = {c.id for c in report.evictable_chunks}
-        assert "c_orphan" not in evictable_ids
+    @pytest.mark.parametrize(
+        "seed, expected",
+        [
+            pytest.param(
+                dict(tasks=[("t1", "completed")], chunks=[_chunk_row("c1")], task_chunks=[("t1", "c1")]),
+                ("c1", True),
+                id="task_complete",
+            ),
+            pytest.param(
+                dict(tasks=[("t1", "in_progress")], chunks=[_chunk_row("c1")], task_chunks=[("t1", "c1")]),
+                ("c1", False),
+                id="task_in_progress",
+            ),
+            # Chunks with no task association are kept (unknown ownership).
+            pytest.param(
+                dict(chunks=[_chunk_row("c_orphan")]),
+                ("c_orphan", False),
+                id="untagged",
+            ),
+        ],
+    )
+    def test_eviction_follows_owning_task(self, seed, expected):
+        chunk_id, should_be_evictable = expected
+        _seed(**seed)
+        assert (chunk_id in _evictable()) == should_be_evictable
 
 
 class TestSharedChunkRefCounting:
-    def test_shared_chunk_kept_if_one_task_active(self):
-        """c1 owned by t1 (done) AND t2 (active) → not evictable."""
-        from raii.task_registry import TaskRegistry
-        reg = TaskRegistry()
-        reg.create("t1", "Task 1")
-        reg.create("t2", "Task 2")
-        reg.update_status("t1", "completed")
-        # t2 stays in_progress
-        _chunk("c_shared", task_id="t1")
-        # Also tag to t2
-        from raii.storage import get_conn
-        with get_conn() as conn:
-            conn.execute(
-                "INSERT OR IGNORE INTO task_chunks (task_id, chunk_id, tagged_at) VALUES (?, ?, ?)",
-                ("t2", "c_shared", _ts()),
-            )
-        report = _engine(registry=reg).run(update_db=False)
-        evictable_ids = {c.id for c in report.evictable_chunks}
-        assert "c_shared" not in evictable_ids
-
-    def test_shared_chunk_evictable_when_all_tasks_complete(self):
-        from raii.task_registry import TaskRegistry
-        reg = TaskRegistry()
-        reg.create("t1", "Task 1")
-        reg.create("t2", "Task 2")
-        reg.update_status("t1", "completed")
-        reg.update_status("t2", "completed")
-        _chunk("c_shared", task_id="t1")
-        from raii.storage import get_conn
-        with get_conn() as conn:
-            conn.execute(
-                "INSERT OR IGNORE INTO task_chunks (task_id, chunk_id, tagged_at) VALUES (?, ?, ?)",
-                ("t2", "c_shared", _ts()),
-            )
-        report = _engine(registry=reg).run(update_db=False)
-        evictable_ids = {c.id for c in report.evictable_chunks}
-        assert "c_shared" in evictable_ids
+    @pytest.mark.parametrize(
+        "other_status, should_be_evictable",
+        [
+            # c_shared owned by t1 (done) AND t2 (active) → not evictable.
+            pytest.param("in_progress", False, id="one_task_active"),
+            pytest.param("completed", True, id="all_tasks_complete"),
+        ],
+    )
+    def test_shared_chunk(self, other_status, should_be_evictable):
+        _seed(
+            tasks=[("t1", "completed"), ("t2", other_status)],
+            chunks=[_chunk_row("c_shared")],
+            task_chunks=[("t1", "c_shared"), ("t2", "c_shared")],
+        )
+        assert ("c_shared" in _evictable()) == should_be_evictable
 
 
 class TestReferenceEdgeBlocking:
     def test_ref_edge_from_active_task_blocks_eviction(self):
         """Even if c1 belongs to a completed task, an active reference edge blocks eviction."""
-        from raii.task_registry import TaskRegistry
-        from raii.reference_graph import ReferenceGraph
         reg = TaskRegistry()
         reg.create("t1", "Done task")
         reg.create("t2", "Active task")
@@ -167,13 +169,10 @@ class TestReferenceEdgeBlocking:
         graph = ReferenceGraph()
         graph.add_edge("t2", "c1", "cited_in_reasoning")
 
-        report = _engine(registry=reg, graph=graph).run(update_db=False)
-        evictable_ids = {c.id for c in report.evictable_chunks}
+        evictable_ids = _evictable(registry=reg, graph=graph)
         assert "c1" not in evictable_ids
 
     def test_ref_edge_from_completed_task_does_not_block(self):
-        from raii.task_registry import TaskRegistry
-        from raii.reference_graph import ReferenceGraph
         reg = TaskRegistry()
         reg.create("t1", "Task 1")
         reg.create("t2", "Task 2")
@@ -184,69 +183,71 @@ class TestReferenceEdgeBlocking:
         graph = ReferenceGraph()
         graph.add_edge("t2", "c1", "builds_on")
 
-        report = _engine(registry=reg, graph=graph).run(update_db=False)
-        evictable_ids = {c.id for c in report.evictable_chunks}
+        evictable_ids = _evictable(registry=reg, graph=graph)
         assert "c1" in evictable_ids
 
 
 class TestSupersession:
-    def test_superseded_chunk_evictable_when_task_done(self):
+    @pytest.mark.parametrize(
+        "status, should_be_evictable",
+        [
+            # Both chunks go once the task is complete, the superseded one included.
+            pytest.param("completed", True, id="task_done"),
+            pytest.param("in_progress", False, id="task_active"),
+        ],
+    )
+    def test_superseded_chunk(self, status, should_be_evictable):
         """Two chunks with same tool+input; earlier one is superseded."""
-        import json
-        from raii.task_registry import TaskRegistry
-        reg = TaskRegistry()
-        reg.create("t1", "Task")
-        reg.update_status("t1", "completed")
-
         same_input = {"file_path": "/foo/bar.py"}
-        # c_old created first
-        _chunk("c_old", tool_name="Read", task_id="t1", tool_input=same_input)
-        # c_new created later with identical tool+input
-        _chunk("c_new", tool_name="Read", task_id="t1", tool_input=same_input)
+        _seed(
+            tasks=[("t1", status)],
+            # c_old created first, c_new later with identical tool+input
+            chunks=[
+                _chunk_row("c_old", "Read", tool_input=same_input),
+                _chunk_row("c_new", "Read", tool_input=same_input),
+            ],
+            task_chunks=[("t1", "c_old"), ("t1", "c_new")],
+        )
 
-        report = _engine(registry=reg).run(update_db=False)
-        evictable_ids = {c.id for c in report.evictable_chunks}
-        # Both should be evictable since task is complete
-        assert "c_old" in evictable_ids
-        assert "c_new" in evictable_ids
+        evictable_ids = _evictable()
+        assert ("c_old" in evictable_ids) == should_be_evictable
+        assert ("c_new" in evictable_ids) == should_be_evictable
 
-    def test_superseded_chunk_kept_if_task_active(self):
-        import json
-        from raii.task_registry import TaskRegistry
+    def test_stored_signature_matches_legacy_row(self):
+        """An ingested chunk supersedes a row without sig_hash, whatever the key order."""
         reg = TaskRegistry()
-        reg.create("t1", "Task")
-        reg.update_status("t1", "in_progress")
+        reg.create("t1", "Done task")
+        reg.create("t2", "Active task")
+        reg.update_status("t1", "completed")
 
-        same_input = {"file_path": "/x.py"}
-        _chunk("c_old", tool_name="Read", task_id="t1", tool_input=same_input)
-        _chunk("c_new", tool_name="Read", task_id="t1", tool_input=same_input)
+        _chunk("c_old", tool_name="Grep", task_id="t1",
+               tool_input={"pattern": "foo", "path": "/src"})
+        ContextTagger(reg).ingest("c_new", "Grep", {"path": "/src", "pattern": "foo"},
+                                  "match", task_id="t1")
+        graph = ReferenceGraph()
+        graph.add_edge("t2", "c_old", "cited_in_reasoning")
 
-        report = _engine(registry=reg).run(update_db=False)
-        evictable_ids = {c.id for c in report.evictable_chunks}
-        assert "c_old" not in evictable_ids
-        assert "c_new" not in evictable_ids
+        report = _engine(registry=reg, graph=graph).run(update_db=False)
+        # Only supersession outranks the active reference edge on c_old.
+        assert "c_old" in {c.id for c in report.evictable_chunks}
 
 
 class TestUpdateDb:
     def test_update_db_marks_evictable_in_sqlite(self):
         reg = _task("t1", "completed")
         _chunk("c1", task_id="t1")
-        _engine(registry=reg).run(update_db=True)
+        tagger = ContextTagger(reg)
+        _engine(registry=reg, tagger=tagger).run(update_db=True)
 
-        from raii.context_tagger import ContextTagger
-        from raii.task_registry import TaskRegistry
-        tagger = ContextTagger(TaskRegistry())
         chunk = tagger.get("c1")
         assert chunk.status == "evictable"
 
     def test_no_update_db_leaves_status_unchanged(self):
         reg = _task("t1", "completed")
         _chunk("c1", task_id="t1")
-        _engine(registry=reg).run(update_db=False)
+        tagger = ContextTagger(reg)
+        _engine(registry=reg, tagger=tagger).run(update_db=False)
 
-        from raii.context_tagger import ContextTagger
-        from raii.task_registry import TaskRegistry
-        tagger = ContextTagger(TaskRegistry())
         chunk = tagger.get("c1")
         assert chunk.status == "fresh"
 
@@ -254,9 +255,6 @@ class TestUpdateDb:
 class TestWriteInvalidation:
     def test_edit_immediately_evicts_prior_read(self):
         """A Read chunk for a file becomes evictable the moment that file is edited."""
-        from raii.task_registry import TaskRegistry
-        from raii.context_tagger import ContextTagger
-
         reg = TaskRegistry()
         reg.create("t1", "Task 1")
         reg.update_status("t1", "in_progress")
@@ -274,9 +272,6 @@ class TestWriteInvalidation:
         assert chunk.status == "evictable"
 
     def test_edit_does_not_evict_read_of_different_file(self):
-        from raii.task_registry import TaskRegistry
-        from raii.context_tagger import ContextTagger
-
         reg = TaskRegistry()
         reg.create("t1", "Task 1")
         reg.update_status("t1", "in_progress")
@@ -292,9 +287,6 @@ class TestWriteInvalidation:
         assert chunk.status == "fresh"
 
     def test_already_evictable_reads_not_double_counted(self):
-        from raii.task_registry import TaskRegistry
-        from raii.context_tagger import ContextTagger
-
         reg = TaskRegistry()
         reg.create("t1", "Task 1")
         reg.update_status("t1", "completed")
@@ -308,12 +300,30 @@ class TestWriteInvalidation:
         n = tagger.invalidate_reads_for_path("/src/auth.py")
         assert n == 0
 
+    def test_multi_file_edit_invalidates_each_path(self):
+        reg = TaskRegistry()
+        reg.create("t1", "Task 1")
+        reg.update_status("t1", "in_progress")
+        tagger = ContextTagger(reg)
+
+        _chunk("c_auth", tool_name="Read", task_id="t1",
+               tool_input={"file_path": "/src/auth.py"})
+        _chunk("c_models", tool_name="Read", task_id="t1",
+               tool_input={"file_path": "/src/models.py"})
+        _chunk("c_views", tool_name="Read", task_id="t1",
+               tool_input={"file_path": "/src/views.py"})
+
+        n = tagger.invalidate_reads_for_paths(["/src/auth.py", "/src/models.py", "/src/auth.py"])
+        assert n == 2
+
+        assert tagger.get("c_auth").status == "evictable"
+        assert tagger.get("c_models").status == "evictable"
+        assert tagger.get("c_views").status == "fresh"
+
 
 class TestDeclaredDependencies:
     def test_dependency_pins_chunks_until_dependent_completes(self):
         """Task A completes, but Task B depends on it → A's chunks stay pinned."""
-        from raii.task_registry import TaskRegistry
-
         reg = TaskRegistry()
         reg.create("task-a", "Design auth module")
         reg.update_status("task-a", "completed")
@@ -330,8 +340,6 @@ class TestDeclaredDependencies:
 
     def test_dependency_released_when_dependent_completes(self):
         """Once Task B also completes, Task A's chunks become evictable."""
-        from raii.task_registry import TaskRegistry
-
         reg = TaskRegistry()
         reg.create("task-a", "Design auth module")
         reg.update_status("task-a", "completed")
@@ -341,31 +349,29 @@ class TestDeclaredDependencies:
 
         _chunk("c1", task_id="task-a")
 
-        report = _engine(registry=reg).run(update_db=False)
-        evictable_ids = {c.id for c in report.evictable_chunks}
+        evictable_ids = _evictable(registry=reg)
         assert "c1" in evictable_ids
 
     def test_no_dependency_evicts_normally(self):
         """Without a dependency declaration, completed task chunks evict as usual."""
-        from raii.task_registry import TaskRegistry
-
         reg = TaskRegistry()
         reg.create("task-a", "Design")
         reg.update_status("task-a", "completed")
 
         _chunk("c1", task_id="task-a")
 
-        report = _engine(registry=reg).run(update_db=False)
-        evictable_ids = {c.id for c in report.evictable_chunks}
+        evictable_ids = _evictable(registry=reg)
         assert "c1" in evictable_ids
 
 
 class TestTokenCounting:
     def test_report_token_counts(self):
-        reg = _task("t1", "completed")
-        _chunk("c1", task_id="t1", size=500)
-        _chunk("c2", task_id="t1", size=300)
-        report = _engine(registry=reg).run(update_db=False)
+        _seed(
+            tasks=[("t1", "completed")],
+            chunks=[_chunk_row("c1", size=500), _chunk_row("c2", size=300)],
+            task_chunks=[("t1", "c1"), ("t1", "c2")],
+        )
+        report = _engine().run(update_db=False)
         assert report.total_evictable_tokens == 800
 
     def test_evictable_token_count_method(self):
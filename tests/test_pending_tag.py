@@ -0,0 +1,68 @@
+"""Tests for the pre/post hook pending tag (raii.pending_tag)."""
+
+import pytest
+
+from raii import pending_tag, storage
+
+
+@pytest.fixture(autouse=True)
+def isolated_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_DIR", tmp_path)
+    return tmp_path
+
+
+class TestPendingTag:
+    def test_round_trip(self):
+        pending_tag.write("tu-1", "task-a")
+        assert pending_tag.read("tu-1") == "task-a"
+
+    def test_no_active_task(self):
+        pending_tag.write("tu-1", None)
+        assert pending_tag.read("tu-1") is None
+
+    def test_other_tool_use_id_does_not_match(self):
+        pending_tag.write("tu-1", "task-a")
+        assert pending_tag.read("tu-2") is None
+
+    def test_latest_write_wins(self):
+        pending_tag.write("tu-1", "a-much-longer-task-id")
+        pending_tag.write("tu-2", "b")
+        assert pending_tag.read("tu-1") is None
+        assert pending_tag.read("tu-2") == "b"
+
+    def test_missing_file_reads_as_no_tag(self):
+        assert pending_tag.read("tu-1") is None
+
+    def test_oversized_tag_is_dropped(self):
+        pending_tag.write("tu-1", "task-a")
+        pending_tag.write("tu-2", "x" * pending_tag.SIZE)
+        assert pending_tag.read("tu-1") is None
+        assert pending_tag.read("tu-2") is None
+
+    def test_visible_to_a_fresh_mapping(self, isolated_dir):
+        pending_tag.write("tu-1", "task-a")
+        pending_tag._maps.clear()   # as if post_tool_use ran in another process
+        assert pending_tag.read("tu-1") == "task-a"
+
+    def test_write_in_progress_reads_as_no_tag(self):
+        pending_tag.write("tu-1", "task-a")
+        mm = pending_tag._map()
+        seq = pending_tag._SEQ.unpack_from(mm, 0)[0]
+        pending_tag._SEQ.pack_into(mm, 0, seq + 1)   # a writer stopped mid-write
+        assert pending_tag.read("tu-1") is None
+        pending_tag.write("tu-1", "task-b")
+        assert pending_tag.read("tu-1") == "task-b"
+
+
+class TestSelfTaggedTaskId:
+    @pytest.mark.parametrize(
+        "tool_name, tool_input, expected",
+        [
+            ("TaskCreate", {"id": "t1"}, "t1"),
+            ("TaskUpdate", {"taskId": "t1", "status": "in_progress"}, "t1"),
+            ("TaskUpdate", {"taskId": "t1", "status": "completed"}, None),
+            ("Read", {"file_path": "/a"}, None),
+        ],
+    )
+    def test_only_lifecycle_calls_naming_their_task(self, tool_name, tool_input, expected):
+        assert pending_tag.self_tagged_task_id(tool_name, tool_input) == expected
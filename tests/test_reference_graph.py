@@ -1,38 +1,31 @@
 """Tests for ReferenceGraph."""
 
-import pytest
-from unittest.mock import patch
 from datetime import datetime, timezone
 
+import pytest
+
+from raii import storage
+from raii.reference_graph import ReferenceGraph
+from raii.storage import get_conn
 
-@pytest.fixture(autouse=True)
-def isolated_db(tmp_path):
-    db_path = tmp_path / "state.db"
-    with (
-        patch("raii.storage.DB_PATH", db_path),
-        patch("raii.storage.DB_DIR", tmp_path),
-    ):
-        yield db_path
+
+pytestmark = pytest.mark.usefixtures("isolated_db")
 
 
 def _seed_task(task_id: str, status: str = "in_progress"):
     """Insert a task directly into the DB."""
-    from raii.storage import get_conn, ensure_db
-    ensure_db()
-    with get_conn() as conn:
+    with get_conn(write=True) as conn:
         conn.execute(
-            "INSERT OR IGNORE INTO tasks (id, subject, status, created_at) VALUES (?, ?, ?, ?)",
+            "INSERT INTO tasks (id, subject, status, created_at) VALUES (?, ?, ?, ?)",
             (task_id, f"Task {task_id}", status, datetime.now(timezone.utc).isoformat()),
         )
 
 
 def _seed_chunk(chunk_id: str):
     """Insert a chunk directly into the DB."""
-    from raii.storage import get_conn, ensure_db
-    ensure_db()
-    with get_conn() as conn:
+    with get_conn(write=True) as conn:
         conn.execute(
-            "INSERT OR IGNORE INTO context_chunks "
+            "INSERT INTO context_chunks "
             "(id, tool_name, is_refetchable, status, size_tokens, created_at) "
             "VALUES (?, ?, ?, ?, ?, ?)",
             (chunk_id, "Read", 1, "fresh", 200, datetime.now(timezone.utc).isoformat()),
@@ -40,7 +33,6 @@ def _seed_chunk(chunk_id: str):
 
 
 def _make_graph():
-    from raii.reference_graph import ReferenceGraph
     return ReferenceGraph()
 
 
@@ -121,3 +113,17 @@ class TestRemoveEdge:
         graph = _make_graph()
         graph.remove_edge("t_ghost", "c_ghost", "cited_in_reasoning")
         assert graph.edge_count() == 0
+
+
+class TestAllEdges:
+    def test_all_edges_is_a_list_and_releases_the_transaction(self):
+        _seed_task("t1")
+        _seed_chunk("c1")
+        graph = _make_graph()
+        graph.add_edge("t1", "c1", "cited_in_reasoning")
+
+        edges = graph.all_edges()
+        assert len(edges) == 1
+        assert edges[0].target_chunk_id == "c1"
+        # The read's transaction is closed before the caller sees the edges.
+        assert not storage._connections[storage.DB_PATH].in_transaction
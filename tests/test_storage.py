@@ -0,0 +1,63 @@
+"""Tests for storage's connection and transaction handling."""
+
+import sqlite3
+
+import pytest
+
+from raii import storage
+
+
+@pytest.fixture
+def file_db(tmp_path, monkeypatch):
+    """A real on-disk DB, so a second connection can contend for its locks."""
+    db_path = tmp_path / "state.db"
+    monkeypatch.setattr(storage, "DB_PATH", db_path)
+    monkeypatch.setattr(storage, "DB_DIR", tmp_path)
+    storage.ensure_db()
+    yield db_path
+    storage._ready_paths.discard(db_path)
+    conn = storage._connections.pop(db_path, None)
+    if conn is not None:
+        conn.close()
+
+
+def _other_writer(db_path):
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=0)
+    conn.execute(
+        "INSERT INTO tasks (id, subject, created_at) VALUES ('t2', 'Other', ?)",
+        (storage.utc_now(),),
+    )
+    conn.close()
+
+
+class TestTransactions:
+    def test_read_block_does_not_take_the_write_lock(self, file_db):
+        with storage.get_conn() as conn:
+            conn.execute("SELECT COUNT(*) FROM tasks").fetchone()
+            _other_writer(file_db)   # would raise "database is locked"
+
+    def test_write_block_takes_the_write_lock(self, file_db):
+        with storage.get_conn(write=True):
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                _other_writer(file_db)
+
+
+class TestEnsureDb:
+    def _forget(self, db_path):
+        storage._ready_paths.discard(db_path)
+        (db_path.parent / f".ready-{storage._SCHEMA_TAG}").unlink()
+
+    def test_rerun_on_migrated_db_succeeds(self, file_db):
+        self._forget(file_db)
+        storage.ensure_db()
+        assert (file_db.parent / f".ready-{storage._SCHEMA_TAG}").exists()
+
+    def test_failed_migration_leaves_no_sentinel(self, file_db, monkeypatch):
+        self._forget(file_db)
+        monkeypatch.setattr(
+            storage, "_MIGRATIONS", storage._MIGRATIONS + ["ALTER TABLE no_such_table ADD x"]
+        )
+        with pytest.raises(sqlite3.OperationalError):
+            storage.ensure_db()
+        assert not (file_db.parent / f".ready-{storage._SCHEMA_TAG}").exists()
+        assert file_db not in storage._ready_paths
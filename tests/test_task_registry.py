@@ -1,81 +1,57 @@
 """Tests for TaskRegistry."""
 
 import pytest
-import tempfile
-import os
-from pathlib import Path
-from unittest.mock import patch
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
 
-# Redirect DB to a temp file for test isolation
-_tmp = tempfile.mktemp(suffix=".db")
+from raii.storage import get_conn
+from raii.task_registry import TaskRegistry
 
 
-@pytest.fixture(autouse=True)
-def isolated_db(tmp_path):
-    """Use a fresh SQLite DB for each test."""
-    db_path = tmp_path / "state.db"
-    db_dir = tmp_path
-    with (
-        patch("raii.storage.DB_PATH", db_path),
-        patch("raii.storage.DB_DIR", db_dir),
-    ):
-        yield db_path
-
-
-def _make_registry():
-    from raii.task_registry import TaskRegistry
+@pytest.fixture
+def reg(isolated_db):
     return TaskRegistry()
 
 
 class TestTaskCreate:
-    def test_create_returns_task(self):
-        reg = _make_registry()
+    def test_create_returns_task(self, reg):
         task = reg.create(id="t1", subject="Do something")
         assert task.id == "t1"
         assert task.subject == "Do something"
         assert task.status == "pending"
         assert task.completed_at is None
 
-    def test_create_persists(self):
-        reg = _make_registry()
+    def test_create_persists(self, reg):
         reg.create(id="t1", subject="Persisted task")
-        reg2 = _make_registry()
+        reg2 = TaskRegistry()
         t = reg2.get("t1")
         assert t is not None
         assert t.subject == "Persisted task"
 
-    def test_create_with_parent(self):
-        reg = _make_registry()
+    def test_create_with_parent(self, reg):
         reg.create(id="parent", subject="Parent")
         child = reg.create(id="child", subject="Child", parent_id="parent")
         assert child.parent_id == "parent"
 
-    def test_get_nonexistent_returns_none(self):
-        reg = _make_registry()
+    def test_get_nonexistent_returns_none(self, reg):
         assert reg.get("nope") is None
 
 
 class TestTaskStatus:
-    def test_update_to_in_progress(self):
-        reg = _make_registry()
-        reg.create(id="t1", subject="Task")
-        updated = reg.update_status("t1", "in_progress")
-        assert updated.status == "in_progress"
-        assert updated.completed_at is None
-
-    def test_update_to_completed_sets_timestamp(self):
-        reg = _make_registry()
+    @pytest.mark.parametrize(
+        "status, sets_completed_at",
+        [("in_progress", False), ("completed", True)],
+    )
+    def test_update_status(self, reg, status, sets_completed_at):
         reg.create(id="t1", subject="Task")
-        updated = reg.update_status("t1", "completed")
-        assert updated.status == "completed"
-        assert updated.completed_at is not None
+        updated = reg.update_status("t1", status)
+        assert updated.status == status
+        assert (updated.completed_at is not None) == sets_completed_at
 
-    def test_update_nonexistent_returns_none(self):
-        reg = _make_registry()
+    def test_update_nonexistent_returns_none(self, reg):
         assert reg.update_status("ghost", "completed") is None
 
-    def test_is_active_and_complete(self):
-        reg = _make_registry()
+    def test_is_active_and_complete(self, reg):
         reg.create(id="t1", subject="Task")
         t = reg.get("t1")
         assert t.is_active()
@@ -88,76 +64,106 @@ class TestTaskStatus:
 
 
 class TestListActive:
-    def test_list_active_filters_completed(self):
-        reg = _make_registry()
+    @pytest.mark.parametrize(
+        "method, expected_ids",
+        [("list_active", ["t1"]), ("list_all", ["t1", "t2"])],
+    )
+    def test_list_filters_by_status(self, reg, method, expected_ids):
         reg.create(id="t1", subject="Active")
         reg.create(id="t2", subject="Done")
         reg.update_status("t2", "completed")
 
-        active = reg.list_active()
-        ids = {t.id for t in active}
-        assert "t1" in ids
-        assert "t2" not in ids
+        tasks = getattr(reg, method)()
+        assert sorted(t.id for t in tasks) == expected_ids
 
-    def test_list_all_includes_completed(self):
-        reg = _make_registry()
-        reg.create(id="t1", subject="Task1")
-        reg.create(id="t2", subject="Task2")
-        reg.update_status("t2", "completed")
-        all_tasks = reg.list_all()
-        assert len(all_tasks) == 2
-
-
-def _seed_chunk_row(chunk_id: str):
-    """Insert a minimal chunk row to satisfy the FK constraint."""
-    from raii.storage import get_conn, ensure_db
-    from datetime import datetime, timezone
-    ensure_db()
-    with get_conn() as conn:
-        conn.execute(
-            "INSERT OR IGNORE INTO context_chunks "
+
+# No test here reads a chunk's created_at; one fixed value saves a clock
+# read and a format per seeded row.
+_FIXED_TS = datetime(2024, 1, 1, tzinfo=timezone.utc).isoformat()
+
+
+def _seed_chunks(ids):
+    """Insert minimal chunk rows, in one transaction, to satisfy the FK constraint."""
+    with get_conn(write=True) as conn:
+        conn.executemany(
+            "INSERT INTO context_chunks "
             "(id, tool_name, is_refetchable, status, size_tokens, created_at) "
             "VALUES (?, ?, ?, ?, ?, ?)",
-            (chunk_id, "Bash", 0, "fresh", 100, datetime.now(timezone.utc).isoformat()),
+            [(chunk_id, "Bash", 0, "fresh", 100, _FIXED_TS) for chunk_id in ids],
         )
 
 
 class TestChunkTagging:
-    def test_tag_chunk_associates_with_task(self):
-        reg = _make_registry()
+    def test_tag_chunk_associates_with_task(self, reg):
         reg.create(id="t1", subject="Task")
-        _seed_chunk_row("chunk-abc")
+        _seed_chunks(["chunk-abc"])
         reg.tag_chunk("t1", "chunk-abc")
 
         chunks = reg.chunks_for_task("t1")
         assert "chunk-abc" in chunks
 
-    def test_tasks_for_chunk(self):
-        reg = _make_registry()
+    def test_tasks_for_chunk(self, reg):
         reg.create(id="t1", subject="Task")
         reg.create(id="t2", subject="Task2")
-        _seed_chunk_row("shared-chunk")
-        reg.tag_chunk("t1", "shared-chunk")
-        reg.tag_chunk("t2", "shared-chunk")
+        _seed_chunks(["shared-chunk"])
+        with get_conn(write=True) as conn:
+            conn.executemany(
+                "INSERT INTO task_chunks (task_id, chunk_id, tagged_at) VALUES (?, ?, ?)",
+                [("t1", "shared-chunk", _FIXED_TS), ("t2", "shared-chunk", _FIXED_TS)],
+            )
 
-        from raii.task_registry import TaskRegistry
         reg2 = TaskRegistry()
         tasks = reg2.tasks_for_chunk("shared-chunk")
-        assert {t.id for t in tasks} == {"t1", "t2"}
+        assert sorted(t.id for t in tasks) == ["t1", "t2"]
 
 
 class TestGetCurrentActive:
-    def test_returns_in_progress_task(self):
-        reg = _make_registry()
+    def test_returns_in_progress_task(self, reg):
         reg.create(id="t1", subject="T1")
         reg.update_status("t1", "in_progress")
         active = reg.get_current_active()
         assert active is not None
         assert active.id == "t1"
 
-    def test_returns_none_when_all_complete(self):
-        reg = _make_registry()
+    def test_returns_none_when_all_complete(self, reg):
         reg.create(id="t1", subject="T1")
         reg.update_status("t1", "completed")
         active = reg.get_current_active()
         assert active is None
+
+
+class TestThreads:
+    def test_registry_usable_from_several_threads(self, reg):
+        reg.create(id="t0", subject="Made on the main thread")
+
+        def create(i):
+            reg.create(id=f"t{i}", subject=f"Task {i}")
+            reg.update_status(f"t{i}", "in_progress")
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(create, range(1, 21)))
+
+        assert len(reg.list_active()) == 21
+
+
+class TestSessionSummary:
+    def test_active_count_and_recent_completed(self, reg):
+        reg.create("p", "Pending")
+        reg.create("a", "Active")
+        reg.update_status("a", "in_progress")
+        for i in range(7):
+            reg.create(f"d{i}", f"Done {i}")
+            reg.update_status(f"d{i}", "completed")
+
+        active, completed_count, recent = reg.session_summary(recent=5)
+
+        assert sorted(t.id for t in active) == ["a", "p"]
+        assert completed_count == 7
+        assert [t.id for t in recent] == ["d6", "d5", "d4", "d3", "d2"]
+
+    def test_no_completed_tasks(self, reg):
+        reg.create("a", "Active")
+        active, completed_count, recent = reg.session_summary()
+        assert [t.id for t in active] == ["a"]
+        assert completed_count == 0
+        assert recent == []